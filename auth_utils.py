@@ -2,10 +2,18 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import os
+import time
 from dotenv import load_dotenv
 
+from metrics import PASSWORD_HASH_TIME
+from cache import TTLCache
+from invalidation import register_reset
+
 load_dotenv()
 
 # Секретный ключ для подписи JWT
@@ -13,8 +21,30 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 часа
 
+# Стоимость bcrypt (log2 числа раундов): компромисс между скоростью и стойкостью
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Сколько хеширований может идти одновременно и сколько ждать свободного слота
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
 # Контекст для хеширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS
+)
+
+# bcrypt отпускает GIL, поэтому хватает пула потоков
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+_hash_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+
+
+class PasswordHashingBusy(Exception):
+    """Очередь на хеширование паролей переполнена"""
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +52,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def _run_hashing(operation: str, func, *args):
+    # Ждем слот не дольше PASSWORD_HASH_QUEUE_TIMEOUT, дальше - отказ
+    try:
+        await asyncio.wait_for(_hash_slots.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise PasswordHashingBusy()
+
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+        PASSWORD_HASH_TIME.observe((operation,), time.perf_counter() - started)
+
+# Асинхронные версии для обработчиков: не блокируют event loop
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing("verify", verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing("hash", get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -33,13 +85,67 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-# Основная функция декодирования
-def decode_jwt_token(token: str) -> Optional[dict]:
+# ===== Кэш проверенных токенов =====
+# Клиент предъявляет один и тот же токен весь срок его жизни: подпись
+# проверяем один раз, дальше берем claims по хешу токена до его exp
+JWT_CACHE_MAX_SIZE = int(os.getenv("JWT_CACHE_MAX_SIZE", "10000"))
+
+# TTL задается на каждую запись (до exp), общий TTL не используется
+token_cache = TTLCache(maxsize=JWT_CACHE_MAX_SIZE, ttl=0)
+
+# Отзыв токенов хранится в БД: claim tv - users.token_version на момент
+# выдачи. Увеличение token_version отзывает все ранее выданные токены
+# пользователя; сверка - в dependencies._authenticate, а не в этом кэше
+TOKEN_VERSION_CLAIM = "tv"
+
+# Сообщений для кэша токенов нет, но после обрыва шины его сбрасываем вместе
+# с остальными: следующий запрос заново проверит подпись и версию токена
+register_reset(token_cache.clear)
+
+# hook(claims) -> True, если токен отозван; проверяется и при попадании в кэш
+_revocation_hook: Optional[Callable[[dict], bool]] = None
+
+
+def set_revocation_hook(hook: Optional[Callable[[dict], bool]]) -> None:
+    global _revocation_hook
+    _revocation_hook = hook
+
+
+def token_digest(token: str) -> bytes:
+    # Ключ кэша - хеш, сами токены в памяти не храним
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def seconds_until_exp(claims: dict) -> float:
+    exp = claims.get("exp")
+    return float(exp) - time.time() if isinstance(exp, (int, float)) else 0.0
+
+
+def decode_jwt_token_uncached(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
+
+# Основная функция декодирования
+def decode_jwt_token(token: str) -> Optional[dict]:
+    """
+    Claims проверенного токена или None.
+    Возвращает общий для всех запросов словарь - изменять его нельзя.
+    """
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = decode_jwt_token_uncached(token)
+        if payload is None:
+            return None
+        # Запись исчезнет ровно к exp; токен без exp не кэшируем
+        token_cache.set(digest, payload, ttl=seconds_until_exp(payload))
+
+    if _revocation_hook is not None and _revocation_hook(payload):
+        return None
+    return payload
+
 # Алиас для обратной совместимости
 decode_access_token = decode_jwt_token
\ No newline at end of file
@@ -0,0 +1,752 @@
+# benchmark.py
+"""
+Нагрузочный прогон HTTP API на локальной базе.
+
+    python benchmark.py --users 10000 --tasks 5000000      # наполнить базу и прогнать
+    python benchmark.py --skip-seed --requests 500         # повторный прогон на тех же данных
+    python benchmark.py --base-url http://127.0.0.1:8000   # против запущенного uvicorn
+
+Результат - JSON с пропускной способностью и p50/p95/p99 по каждому эндпоинту
+(stdout или --output), ход прогона печатается в stderr.
+Если есть файл базовой линии (--baseline), результаты сравниваются с ним,
+при регрессии процесс завершается с кодом 1.
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sys
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import delete, func, insert, select, text
+
+from auth_utils import TOKEN_VERSION_CLAIM, create_access_token, get_password_hash
+from database import engine
+from migrations import auto_migrate
+from models.task import Task
+from models.user import User, UserRole
+from utils import determine_quadrant, urgency_boundary
+
+API_PREFIX = "/api/v2"
+BENCH_EMAIL_DOMAIN = "bench.local"
+BENCH_PASSWORD = "benchpass"
+DEFAULT_BASELINE = "benchmark_baseline.json"
+COPY_BATCH_SIZE = 50_000
+BULK_BATCH = 50
+SPARE_BATCH = 500
+# Задачи на пользователя для изменяющих эндпоинтов (PUT, complete, bulk)
+SCRATCH_PER_USER = BULK_BATCH
+
+# Слова для заголовков: по ним же ищет /tasks/search
+TITLE_WORDS = [
+    "отчет", "встреча", "лекция", "проект", "покупки", "звонок",
+    "письмо", "ремонт", "тренировка", "экзамен", "презентация", "оплата",
+]
+
+
+# ===== Наполнение базы =====
+def deadline_for(rng: random.Random, now: datetime) -> Optional[datetime]:
+    """Смесь дедлайнов: без срока, просроченные, срочные (до 3 дней) и дальние"""
+    roll = rng.random()
+    if roll < 0.30:
+        return None
+    if roll < 0.45:
+        return now - timedelta(days=rng.randint(1, 30), minutes=rng.randint(0, 1439))
+    if roll < 0.65:
+        return now + timedelta(minutes=rng.randint(10, 3 * 24 * 60))
+    return now + timedelta(days=rng.randint(4, 60), minutes=rng.randint(0, 1439))
+
+
+def task_records(rng: random.Random, user_ids: List[int], count: int, now: datetime):
+    boundary = urgency_boundary(now)
+    for _ in range(count):
+        title = " ".join(rng.sample(TITLE_WORDS, 2)).capitalize()
+        is_important = rng.random() < 0.4
+        deadline_at = deadline_for(rng, now)
+        is_urgent = deadline_at is not None and deadline_at < boundary
+        completed = rng.random() < 0.35
+        created_at = now - timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+        yield (
+            title,
+            f"Описание: {title.lower()}" if rng.random() < 0.5 else None,
+            is_important,
+            deadline_at,
+            determine_quadrant(is_important, is_urgent),
+            completed,
+            created_at,
+            created_at + timedelta(hours=rng.randint(1, 240)) if completed else None,
+            rng.choice(user_ids),
+        )
+
+
+async def clear_bench_data() -> None:
+    bench_users = select(User.id).where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+    async with engine.begin() as conn:
+        await conn.execute(delete(Task).where(Task.user_id.in_(bench_users)))
+        await conn.execute(delete(User).where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}")))
+
+
+async def seed(users: int, tasks: int, rng: random.Random) -> None:
+    """
+    Пользователи - обычным INSERT (их немного), задачи - через COPY пачками.
+    Хеш пароля считается один раз: bcrypt на каждого пользователя занял бы часы.
+    """
+    print(f"🌱 Наполнение базы: {users} пользователей, {tasks} задач...", file=sys.stderr)
+    await clear_bench_data()
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+
+    rows = [
+        {
+            "nickname": f"bench_{i}",
+            "email": f"bench{i}@{BENCH_EMAIL_DOMAIN}",
+            "hashed_password": hashed_password,
+            "role": UserRole.USER,
+        }
+        for i in range(users)
+    ]
+    rows.append({
+        "nickname": "bench_admin",
+        "email": f"admin@{BENCH_EMAIL_DOMAIN}",
+        "hashed_password": hashed_password,
+        "role": UserRole.ADMIN,
+    })
+    async with engine.begin() as conn:
+        result = await conn.execute(insert(User).returning(User.id, sort_by_parameter_order=True), rows)
+        user_ids = [row.id for row in result][:-1]
+
+    now = datetime.utcnow()
+    columns = [
+        "title", "description", "is_important", "deadline_at", "quadrant",
+        "completed", "created_at", "completed_at", "user_id",
+    ]
+    started = time.perf_counter()
+    loaded = 0
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        while loaded < tasks:
+            batch = min(COPY_BATCH_SIZE, tasks - loaded)
+            await driver.copy_records_to_table(
+                "tasks",
+                records=task_records(rng, user_ids, batch, now),
+                columns=columns,
+            )
+            loaded += batch
+            print(f"   загружено {loaded}/{tasks} задач", file=sys.stderr)
+
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE users"))
+        await conn.execute(text("ANALYZE tasks"))
+        await conn.commit()
+    print(f"🎉 Наполнение заняло {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+
+# ===== Контекст прогона =====
+@dataclass
+class BenchUser:
+    id: int
+    token: str
+    email: str
+    task_ids: List[int] = field(default_factory=list)
+    # Свои задачи прогона: их меняют PUT/complete/bulk, набор из seed не трогаем
+    scratch_ids: List[int] = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class BenchContext:
+    users: List[BenchUser]
+    admin: BenchUser
+    run_id: str
+    # Задачи с id больше - созданы прогоном и удаляются после него
+    max_seeded_task_id: int = 0
+    counter: int = 0
+    spares: Deque[Tuple[BenchUser, int]] = field(default_factory=deque)
+    # Authorization -> последний ETag списка задач
+    etags: Dict[str, str] = field(default_factory=dict)
+    # Authorization -> пользователь, у которого сейчас идет смена пароля
+    password_changes: Dict[str, BenchUser] = field(default_factory=dict)
+
+    def next_number(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    def user(self, rng: random.Random) -> BenchUser:
+        return rng.choice(self.users)
+
+    def owned_task(self, rng: random.Random) -> Tuple[BenchUser, int]:
+        owners = [user for user in self.users if user.task_ids]
+        if not owners:
+            raise SystemExit("❌ У выбранных пользователей нет задач, запустите без --skip-seed")
+        user = rng.choice(owners)
+        return user, rng.choice(user.task_ids)
+
+    def scratch_user(self, rng: random.Random) -> BenchUser:
+        return rng.choice([user for user in self.users if user.scratch_ids])
+
+    async def make_scratch(self) -> None:
+        """Задачи для изменяющих эндпоинтов: создаются SQL-вставкой вне замера"""
+        async with engine.begin() as conn:
+            for user in self.users:
+                result = await conn.execute(
+                    insert(Task).returning(Task.id, sort_by_parameter_order=True),
+                    [{"title": "Для изменения", "quadrant": "Q4", "user_id": user.id}] * SCRATCH_PER_USER,
+                )
+                user.scratch_ids = [row.id for row in result]
+
+    async def cleanup(self) -> None:
+        """
+        Удаляет созданное прогоном (задачи, зарегистрированных пользователей):
+        повторный прогон с --skip-seed идет на том же наборе, что и базовая линия.
+        """
+        bench_users = select(User.id).where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+        async with engine.begin() as conn:
+            await conn.execute(
+                delete(Task).where(Task.id > self.max_seeded_task_id, Task.user_id.in_(bench_users))
+            )
+            await conn.execute(
+                delete(User).where(
+                    User.email.startswith(f"reg{self.run_id}_", autoescape=True),
+                    User.email.endswith(f"@{BENCH_EMAIL_DOMAIN}", autoescape=True),
+                )
+            )
+
+    async def take_spares(self, count: int) -> Tuple[BenchUser, List[int]]:
+        """Задачи под удаление: создаются SQL-вставкой вне замера"""
+        if len(self.spares) < count:
+            await self._make_spares(max(SPARE_BATCH, count))
+        user, first_id = self.spares.popleft()
+        ids = [first_id]
+        while len(ids) < count and self.spares and self.spares[0][0] is user:
+            ids.append(self.spares.popleft()[1])
+        return user, ids
+
+    async def _make_spares(self, count: int) -> None:
+        user = random.choice(self.users)
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                insert(Task).returning(Task.id),
+                [{"title": "Под удаление", "quadrant": "Q4", "user_id": user.id}] * count,
+            )
+            self.spares.extend((user, row.id) for row in result)
+
+
+async def load_context(sample_users: int, rng: random.Random) -> BenchContext:
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(User.id, User.email, User.role, User.token_version)
+            .where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+            .order_by(User.id)
+        )
+        rows = result.all()
+        if not rows:
+            raise SystemExit("❌ В базе нет тестовых пользователей, запустите без --skip-seed")
+
+        admins = [row for row in rows if row.role == UserRole.ADMIN]
+        regular = [row for row in rows if row.role != UserRole.ADMIN]
+        chosen = rng.sample(regular, min(sample_users, len(regular)))
+
+        users = [
+            BenchUser(
+                id=row.id,
+                email=row.email,
+                token=create_access_token(
+                    data={"sub": str(row.id), "role": "user", TOKEN_VERSION_CLAIM: row.token_version}
+                ),
+            )
+            for row in chosen
+        ]
+        by_id = {user.id: user for user in users}
+        result = await conn.execute(
+            select(Task.id, Task.user_id)
+            .where(Task.user_id.in_(list(by_id)))
+            .limit(len(users) * 20)
+        )
+        for task_id, user_id in result:
+            by_id[user_id].task_ids.append(task_id)
+        max_seeded_task_id = await conn.scalar(select(func.coalesce(func.max(Task.id), 0)))
+
+    if not admins:
+        raise SystemExit("❌ Нет тестового администратора, запустите без --skip-seed")
+    admin_row = admins[0]
+    admin = BenchUser(
+        id=admin_row.id,
+        email=admin_row.email,
+        token=create_access_token(
+            data={"sub": str(admin_row.id), "role": "admin", TOKEN_VERSION_CLAIM: admin_row.token_version}
+        ),
+    )
+    return BenchContext(
+        users=users, admin=admin, run_id=f"{int(time.time())}", max_seeded_task_id=max_seeded_task_id,
+    )
+
+
+# ===== Эндпоинты =====
+# Запрос: метод, путь без префикса API, параметры httpx
+Request = Tuple[str, str, dict]
+
+
+@dataclass
+class Endpoint:
+    name: str
+    build: Callable[[BenchContext, random.Random], Awaitable[Request]]
+    # Доля в смешанном сценарии (примерная структура реального трафика)
+    weight: int = 1
+    ok_statuses: Tuple[int, ...] = (200,)
+    # Вызывается с ответом после замера
+    after: Optional[Callable[[BenchContext, dict, httpx.Response], None]] = None
+
+
+def task_payload(rng: random.Random) -> dict:
+    deadline_at = deadline_for(rng, datetime.utcnow())
+    return {
+        "title": " ".join(rng.sample(TITLE_WORDS, 2)).capitalize(),
+        "description": "Создано бенчмарком",
+        "is_important": rng.random() < 0.4,
+        "deadline_at": deadline_at.isoformat() if deadline_at else None,
+    }
+
+
+async def list_tasks(ctx, rng):
+    return "GET", "/tasks/", {"headers": ctx.user(rng).headers}
+
+
+async def list_tasks_conditional(ctx, rng):
+    # Клиент, который опрашивает список и присылает сохраненный ETag
+    headers = dict(ctx.user(rng).headers)
+    etag = ctx.etags.get(headers["Authorization"])
+    if etag:
+        headers["If-None-Match"] = etag
+    return "GET", "/tasks/", {"headers": headers}
+
+
+def remember_etag(ctx, kwargs, response):
+    if "etag" in response.headers:
+        ctx.etags[kwargs["headers"]["Authorization"]] = response.headers["etag"]
+
+
+async def tasks_today(ctx, rng):
+    return "GET", "/tasks/today", {"headers": ctx.user(rng).headers}
+
+
+async def tasks_due(ctx, rng):
+    start = datetime.utcnow()
+    params = {"from": start.isoformat(), "to": (start + timedelta(days=7)).isoformat()}
+    return "GET", "/tasks/due", {"headers": ctx.user(rng).headers, "params": params}
+
+
+async def tasks_search(ctx, rng):
+    params = {"q": rng.choice(TITLE_WORDS)}
+    return "GET", "/tasks/search", {"headers": ctx.user(rng).headers, "params": params}
+
+
+async def tasks_export(ctx, rng):
+    params = {"format": rng.choice(["ndjson", "csv"])}
+    return "GET", "/tasks/export", {"headers": ctx.user(rng).headers, "params": params}
+
+
+async def tasks_by_status(ctx, rng):
+    path = f"/tasks/status/{rng.choice(['completed', 'pending'])}"
+    return "GET", path, {"headers": ctx.user(rng).headers}
+
+
+async def tasks_by_quadrant(ctx, rng):
+    path = f"/tasks/quadrant/{rng.choice(['Q1', 'Q2', 'Q3', 'Q4'])}"
+    return "GET", path, {"headers": ctx.user(rng).headers}
+
+
+async def get_task(ctx, rng):
+    user, task_id = ctx.owned_task(rng)
+    return "GET", f"/tasks/{task_id}", {"headers": user.headers}
+
+
+async def create_task(ctx, rng):
+    return "POST", "/tasks/", {"headers": ctx.user(rng).headers, "json": task_payload(rng)}
+
+
+async def update_task(ctx, rng):
+    user = ctx.scratch_user(rng)
+    task_id = rng.choice(user.scratch_ids)
+    payload = {"is_important": rng.random() < 0.5}
+    return "PUT", f"/tasks/{task_id}", {"headers": user.headers, "json": payload}
+
+
+async def complete_task(ctx, rng):
+    user = ctx.scratch_user(rng)
+    task_id = rng.choice(user.scratch_ids)
+    return "PATCH", f"/tasks/{task_id}/complete", {"headers": user.headers}
+
+
+async def delete_task(ctx, rng):
+    user, ids = await ctx.take_spares(1)
+    return "DELETE", f"/tasks/{ids[0]}", {"headers": user.headers}
+
+
+async def bulk_create(ctx, rng):
+    payload = {"tasks": [task_payload(rng) for _ in range(BULK_BATCH)]}
+    return "POST", "/tasks/bulk", {"headers": ctx.user(rng).headers, "json": payload}
+
+
+async def bulk_update(ctx, rng):
+    user = ctx.scratch_user(rng)
+    items = [
+        {"id": task_id, "is_important": rng.random() < 0.5}
+        for task_id in user.scratch_ids
+    ]
+    return "PUT", "/tasks/bulk", {"headers": user.headers, "json": {"tasks": items}}
+
+
+async def bulk_complete(ctx, rng):
+    user = ctx.scratch_user(rng)
+    payload = {"ids": user.scratch_ids}
+    return "PATCH", "/tasks/bulk/complete", {"headers": user.headers, "json": payload}
+
+
+async def bulk_delete(ctx, rng):
+    user, ids = await ctx.take_spares(BULK_BATCH)
+    return "POST", "/tasks/bulk/delete", {"headers": user.headers, "json": {"ids": ids}}
+
+
+async def stats(ctx, rng):
+    return "GET", "/stats/", {"headers": ctx.user(rng).headers}
+
+
+async def stats_deadlines(ctx, rng):
+    return "GET", "/stats/deadlines", {"headers": ctx.user(rng).headers}
+
+
+async def auth_register(ctx, rng):
+    number = ctx.next_number()
+    payload = {
+        "nickname": f"bench_reg_{ctx.run_id}_{number}",
+        "email": f"reg{ctx.run_id}_{number}@{BENCH_EMAIL_DOMAIN}",
+        "password": BENCH_PASSWORD,
+    }
+    return "POST", "/auth/register", {"json": payload}
+
+
+async def auth_login(ctx, rng):
+    data = {"username": ctx.user(rng).email, "password": BENCH_PASSWORD}
+    return "POST", "/auth/login", {"data": data}
+
+
+async def auth_me(ctx, rng):
+    return "GET", "/auth/me", {"headers": ctx.user(rng).headers}
+
+
+async def auth_change_password(ctx, rng):
+    # Пароль меняется на тот же - данные прогона остаются рабочими.
+    # Смена пароля отзывает токены пользователя: пока запрос идет, пользователь
+    # не участвует в других запросах, новый токен сохраняет remember_new_token
+    if not ctx.users:
+        raise SystemExit("❌ Для смены пароля --concurrency должен быть не больше --sample-users")
+    user = ctx.users.pop(rng.randrange(len(ctx.users)))
+    ctx.password_changes[user.headers["Authorization"]] = user
+    payload = {"old_password": BENCH_PASSWORD, "new_password": BENCH_PASSWORD}
+    return "PATCH", "/auth/change-password", {"headers": user.headers, "json": payload}
+
+
+def remember_new_token(ctx, kwargs, response):
+    user = ctx.password_changes.pop(kwargs["headers"]["Authorization"])
+    if response.status_code == 200:
+        user.token = response.json()["access_token"]
+    ctx.users.append(user)
+
+
+async def admin_users(ctx, rng):
+    return "GET", "/admin/users", {"headers": ctx.admin.headers}
+
+
+async def admin_requadrant(ctx, rng):
+    return "GET", "/admin/jobs/requadrant", {"headers": ctx.admin.headers}
+
+
+async def admin_pool(ctx, rng):
+    return "GET", "/admin/pool", {"headers": ctx.admin.headers}
+
+
+async def admin_cache(ctx, rng):
+    return "GET", "/admin/cache", {"headers": ctx.admin.headers}
+
+
+ENDPOINTS: List[Endpoint] = [
+    Endpoint("GET /tasks/", list_tasks, weight=20),
+    Endpoint("GET /tasks/ If-None-Match", list_tasks_conditional, weight=10,
+             ok_statuses=(200, 304), after=remember_etag),
+    Endpoint("GET /tasks/today", tasks_today, weight=15),
+    Endpoint("GET /tasks/due", tasks_due, weight=5),
+    Endpoint("GET /tasks/search", tasks_search, weight=5, ok_statuses=(200, 404)),
+    Endpoint("GET /tasks/export", tasks_export, weight=1),
+    Endpoint("GET /tasks/status/{status}", tasks_by_status, weight=5),
+    Endpoint("GET /tasks/quadrant/{quadrant}", tasks_by_quadrant, weight=8),
+    Endpoint("GET /tasks/{task_id}", get_task, weight=10),
+    Endpoint("POST /tasks/", create_task, weight=5, ok_statuses=(201,)),
+    Endpoint("PUT /tasks/{task_id}", update_task, weight=3),
+    Endpoint("PATCH /tasks/{task_id}/complete", complete_task, weight=3),
+    Endpoint("DELETE /tasks/{task_id}", delete_task, weight=1),
+    Endpoint("POST /tasks/bulk", bulk_create, weight=1, ok_statuses=(201,)),
+    Endpoint("PUT /tasks/bulk", bulk_update, weight=1),
+    Endpoint("PATCH /tasks/bulk/complete", bulk_complete, weight=1),
+    Endpoint("POST /tasks/bulk/delete", bulk_delete, weight=1),
+    Endpoint("GET /stats/", stats, weight=8),
+    Endpoint("GET /stats/deadlines", stats_deadlines, weight=3),
+    Endpoint("POST /auth/register", auth_register, weight=0, ok_statuses=(201,)),
+    Endpoint("POST /auth/login", auth_login, weight=1),
+    Endpoint("GET /auth/me", auth_me, weight=5),
+    Endpoint("PATCH /auth/change-password", auth_change_password, weight=0,
+             after=remember_new_token),
+    Endpoint("GET /admin/users", admin_users, weight=0),
+    Endpoint("GET /admin/jobs/requadrant", admin_requadrant, weight=0),
+    Endpoint("GET /admin/pool", admin_pool, weight=0),
+    Endpoint("GET /admin/cache", admin_cache, weight=0),
+]
+
+# bcrypt-эндпоинты упираются в PASSWORD_HASH_WORKERS, для них хватит меньшего числа запросов
+SLOW_ENDPOINTS = {"POST /auth/register", "POST /auth/login", "PATCH /auth/change-password"}
+
+
+# ===== Прогон =====
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], statuses: Counter, errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    ctx: BenchContext,
+    pick: Callable[[random.Random], Endpoint],
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> Dict[str, dict]:
+    """
+    concurrency клиентов делят общий счетчик запросов.
+    Время подготовки запроса (build) в замер не входит.
+    """
+    remaining = [requests]
+    samples: Dict[str, dict] = {}
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            endpoint = pick(rng)
+            method, path, kwargs = await endpoint.build(ctx, rng)
+            sample = samples.setdefault(endpoint.name, {
+                "latencies": [], "statuses": Counter(), "errors": 0,
+            })
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, API_PREFIX + path, **kwargs)
+                await response.aread()
+            except httpx.HTTPError:
+                sample["errors"] += 1
+                sample["statuses"]["error"] += 1
+                continue
+            sample["latencies"].append(time.perf_counter() - started)
+            sample["statuses"][response.status_code] += 1
+            if response.status_code not in endpoint.ok_statuses:
+                sample["errors"] += 1
+            if endpoint.after is not None:
+                endpoint.after(ctx, kwargs, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        name: summarize(sample["latencies"], sample["statuses"], sample["errors"], elapsed)
+        for name, sample in samples.items()
+    }
+
+
+async def run_benchmark(args) -> dict:
+    rng = random.Random(args.seed)
+    ctx = await load_context(args.sample_users, rng)
+    await ctx.make_scratch()
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        app_context = None
+    else:
+        # Приложение в том же процессе: события startup/shutdown запускаем сами
+        from main import app
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://benchmark",
+            timeout=args.timeout,
+        )
+        app_context = app.router.lifespan_context(app)
+        await app_context.__aenter__()
+
+    selected = [
+        endpoint for endpoint in ENDPOINTS
+        if not args.only or any(part in endpoint.name for part in args.only)
+    ]
+    results: Dict[str, dict] = {}
+    try:
+        async with client:
+            # Прогрев: соединения пула, кэши планов и пользователей
+            for endpoint in selected:
+                await drive(client, ctx, lambda _rng, e=endpoint: e, 2, 1, args.seed)
+
+            for endpoint in selected:
+                requests = args.slow_requests if endpoint.name in SLOW_ENDPOINTS else args.requests
+                summary = await drive(
+                    client, ctx, lambda _rng, e=endpoint: e,
+                    requests, args.concurrency, args.seed,
+                )
+                if endpoint.name not in summary:
+                    continue
+                results[endpoint.name] = summary[endpoint.name]
+                print(
+                    f"   {endpoint.name:<36} {results[endpoint.name]['throughput_rps']:>9} rps  "
+                    f"p50 {results[endpoint.name]['p50_ms']:>8} мс  "
+                    f"p95 {results[endpoint.name]['p95_ms']:>8} мс  "
+                    f"p99 {results[endpoint.name]['p99_ms']:>8} мс",
+                    file=sys.stderr,
+                )
+
+            mix = [endpoint for endpoint in selected if endpoint.weight > 0]
+            mixed = {}
+            if mix and args.mix_requests > 0:
+                weights = [endpoint.weight for endpoint in mix]
+                started = time.perf_counter()
+                mixed = await drive(
+                    client, ctx, lambda worker_rng: worker_rng.choices(mix, weights)[0],
+                    args.mix_requests, args.concurrency, args.seed,
+                )
+                elapsed = time.perf_counter() - started
+                mixed["total"] = {
+                    "requests": args.mix_requests,
+                    "throughput_rps": round(args.mix_requests / elapsed, 2),
+                }
+    finally:
+        if app_context is not None:
+            await app_context.__aexit__(None, None, None)
+        await ctx.cleanup()
+
+    return {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "target": args.base_url or "in-process",
+            "concurrency": args.concurrency,
+            "requests_per_endpoint": args.requests,
+            "sample_users": len(ctx.users),
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "endpoints": results,
+        "mixed": mixed,
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Регрессия: p95 выросла или пропускная способность упала больше чем на tolerance"""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous or not previous.get("requests"):
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} мс")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {previous['throughput_rps']} -> {current['throughput_rps']} rps"
+            )
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: ошибок {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+async def main(args) -> int:
+    if not args.skip_seed:
+        await auto_migrate()
+        await seed(args.users, args.tasks, random.Random(args.seed))
+
+    print("🚀 Прогон эндпоинтов...", file=sys.stderr)
+    results = await run_benchmark(args)
+    await engine.dispose()
+
+    try:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        baseline = None
+
+    regressions = []
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        results["baseline"] = {
+            "file": args.baseline,
+            "tolerance": args.tolerance,
+            "regressions": regressions,
+        }
+
+    report = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report)
+    else:
+        print(report)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            file.write(report)
+        print(f"💾 Базовая линия сохранена в {args.baseline}", file=sys.stderr)
+
+    if regressions:
+        print("❌ Регрессии относительно базовой линии:", file=sys.stderr)
+        for line in regressions:
+            print(f"   {line}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон HTTP API")
+    parser.add_argument("--users", type=int, default=1000, help="пользователей при наполнении")
+    parser.add_argument("--tasks", type=int, default=100_000, help="задач при наполнении")
+    parser.add_argument("--skip-seed", action="store_true", help="использовать уже загруженные данные")
+    parser.add_argument("--seed", type=int, default=42, help="зерно генератора данных и запросов")
+    parser.add_argument("--sample-users", type=int, default=200, help="сколько пользователей шлют запросы")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000, help="запросов на эндпоинт")
+    parser.add_argument("--slow-requests", type=int, default=50, help="запросов на bcrypt-эндпоинты")
+    parser.add_argument("--mix-requests", type=int, default=5000, help="запросов в смешанном сценарии")
+    parser.add_argument("--only", nargs="*", help="только эндпоинты, в имени которых есть подстрока")
+    parser.add_argument("--base-url", help="адрес запущенного сервера; по умолчанию приложение в процессе")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="файл для JSON-отчета; по умолчанию stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="записать результат как базовую линию")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="допустимое ухудшение, доля")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,55 @@
+# benchmark_jwt.py
+"""
+Стоимость проверки JWT на один запрос: полная проверка подписи (как было)
+против кэша проверенных токенов. База данных не нужна.
+
+    python benchmark_jwt.py --tokens 1000 --iterations 200000
+"""
+import argparse
+import json
+import time
+
+from auth_utils import create_access_token, decode_jwt_token, decode_jwt_token_uncached, token_cache
+
+
+def measure(decode, tokens, iterations: int) -> dict:
+    count = len(tokens)
+    started = time.perf_counter()
+    for i in range(iterations):
+        if decode(tokens[i % count]) is None:
+            raise SystemExit("❌ Токен не прошел проверку")
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "us_per_decode": round(elapsed / iterations * 1_000_000, 3),
+        "decodes_per_second": round(iterations / elapsed),
+    }
+
+
+def main(args):
+    # Как в реальном трафике: каждый клиент много раз предъявляет свой токен
+    tokens = [
+        create_access_token(data={"sub": str(user_id), "role": "user"})
+        for user_id in range(1, args.tokens + 1)
+    ]
+
+    uncached = measure(decode_jwt_token_uncached, tokens, args.iterations)
+
+    token_cache.clear()
+    token_cache.hits = token_cache.misses = 0
+    cached = measure(decode_jwt_token, tokens, args.iterations)
+    cached["hit_ratio"] = round(token_cache.hits / (token_cache.hits + token_cache.misses), 4)
+
+    print(json.dumps({
+        "tokens": args.tokens,
+        "uncached": uncached,
+        "cached": cached,
+        "speedup": round(uncached["us_per_decode"] / cached["us_per_decode"], 1),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Стоимость проверки JWT: без кэша и с кэшем")
+    parser.add_argument("--tokens", type=int, default=1000, help="разных токенов (клиентов)")
+    parser.add_argument("--iterations", type=int, default=100_000)
+    main(parser.parse_args())
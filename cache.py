@@ -0,0 +1,149 @@
+# cache.py
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from dotenv import load_dotenv
+
+from invalidation import publish, register_handler
+
+load_dotenv()
+
+
+class TTLCache:
+    """
+    Ограниченный LRU-кэш с временем жизни записей.
+    Рассчитан на один event loop воркера, поэтому без блокировок.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SizedLRUCache:
+    """
+    LRU-кэш готовых ответов с бюджетом памяти в байтах.
+    Запись хранит версию данных, с которой она построена:
+    если текущая версия другая, запись считается устаревшей.
+    """
+
+    # Примерные накладные расходы на ключ и кортеж записи
+    ENTRY_OVERHEAD_BYTES = 256
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        item_version, expires_at, size, value = item
+        if item_version != version or expires_at <= time.monotonic():
+            self._remove(key)
+            self.stale += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, version: Hashable, value: Any, size: int, ttl: float) -> None:
+        size += self.ENTRY_OVERHEAD_BYTES
+        if size > self.max_entry_bytes or size > self.max_bytes or ttl <= 0:
+            return
+        self._remove(key)
+        self._data[key] = (version, time.monotonic() + ttl, size, value)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size_bytes -= item[2]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size_bytes = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ===== Кэш аутентифицированных пользователей =====
+# Храним только идентичность и роль (без хеша пароля), ключ - id пользователя
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Сбросить закэшированные данные пользователя (смена пароля, роли) во всех воркерах"""
+    user_cache.pop(user_id)
+    publish("user", user_id)
+
+
+register_handler(
+    "user",
+    lambda user_id, data: user_cache.pop(user_id),
+    reset=user_cache.clear,
+)
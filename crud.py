@@ -1,9 +1,9 @@
 # crud.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from models.task import Task
+from sqlalchemy import select, update, delete, literal, Boolean, DateTime
+from models.task import Task, search_filter, search_rank
 from schemas import TaskCreate, TaskUpdate
-from utils import calculate_urgency, determine_quadrant
+from utils import calculate_urgency, determine_quadrant, quadrant_sql
 from datetime import datetime
 from typing import Optional, List
 
@@ -29,54 +29,68 @@ class TaskCRUD:
             quadrant=quadrant_str,  # Сохраняем как строку "Q1"
             completed=False
         )
+        # created_at приходит в RETURNING самого INSERT (eager_defaults)
         db.add(db_task)
         await db.commit()
-        await db.refresh(db_task)
         return db_task
 
     @staticmethod
     async def update(db: AsyncSession, task_id: int, task_update: TaskUpdate) -> Optional[Task]:
-        task = await db.get(Task, task_id)
-        if not task:
-            return None
-
         # Применяем все переданные поля
         update_data = task_update.dict(exclude_unset=True, exclude={"quadrant"})
-        for field, value in update_data.items():
-            setattr(task, field, value)
 
-        # Пересчитываем urgent и quadrant после обновления
-        is_urgent = calculate_urgency(task.deadline_at)
-        task.quadrant = determine_quadrant(task.is_important, is_urgent)
+        # Пересчитываем urgent и quadrant в том же UPDATE
+        is_important = (
+            literal(update_data["is_important"], Boolean)
+            if "is_important" in update_data else Task.is_important
+        )
+        deadline_at = (
+            literal(update_data["deadline_at"], DateTime)
+            if "deadline_at" in update_data else Task.deadline_at
+        )
 
-        db.add(task)
+        result = await db.scalars(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(
+                **update_data,
+                quadrant=quadrant_sql(is_important, deadline_at, datetime.utcnow())
+            )
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+        task = result.one_or_none()
         await db.commit()
-        await db.refresh(task)
         return task
 
     @staticmethod
     async def complete(db: AsyncSession, task_id: int) -> Optional[Task]:
-        task = await db.get(Task, task_id)
-        if not task:
-            return None
-        task.completed = True
-        task.completed_at = datetime.utcnow()
-
-        # Пересчитываем квадрант (как строку!)
-        is_urgent = calculate_urgency(task.deadline_at)
-        quadrant_str = determine_quadrant(task.is_important, is_urgent)
-        task.quadrant = quadrant_str  # Сохраняем строку
-        
+        now = datetime.utcnow()
+        # Пересчитываем квадрант (как строку!) прямо в UPDATE
+        result = await db.scalars(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(
+                completed=True,
+                completed_at=now,
+                quadrant=quadrant_sql(Task.is_important, Task.deadline_at, now)
+            )
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+        task = result.one_or_none()
         await db.commit()
-        await db.refresh(task)
         return task
 
     @staticmethod
     async def delete(db: AsyncSession, task_id: int) -> Optional[Task]:
-        task = await db.get(Task, task_id)
-        if not task:
-            return None
-        await db.delete(task)
+        result = await db.scalars(
+            delete(Task)
+            .where(Task.id == task_id)
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+        task = result.one_or_none()
         await db.commit()
         return task
 
@@ -104,14 +118,15 @@ class TaskCRUD:
         return tasks
 
     @staticmethod
-    async def search(db: AsyncSession, query: str):
+    async def search(db: AsyncSession, query: str, user_id: Optional[int] = None, limit: int = 50):
         if len(query) < 2:
             return []
-            
+
+        stmt = select(Task).where(search_filter(query))
+        if user_id is not None:
+            stmt = stmt.where(Task.user_id == user_id)
+
         result = await db.execute(
-            select(Task).where(
-                Task.title.ilike(f"%{query}%") | 
-                Task.description.ilike(f"%{query}%")
-            )
+            stmt.order_by(search_rank(query).desc(), Task.id.desc()).limit(limit)
         )
         return result.scalars().all()
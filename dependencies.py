@@ -3,10 +3,14 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Optional
+from typing import AsyncGenerator, Optional
 
-from database import get_async_session
+from database import get_async_session, read_session_maker
 from models.user import User, UserRole
+from cache import user_cache
+from invalidation import last_change_at
+from metrics import timed
+from auth_utils import TOKEN_VERSION_CLAIM
 
 # Импортируем функцию из auth_utils под другим именем
 try:
@@ -24,6 +28,11 @@ async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_async_session)
 ) -> User:
+    # Время аутентификации попадает в Server-Timing (auth)
+    with timed("auth_seconds"):
+        return await _authenticate(token, db)
+
+async def _authenticate(token: str, db: AsyncSession) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учетные данные",
@@ -38,15 +47,34 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    result = await db.execute(
-        select(User).where(User.id == int(user_id))
-    )
-    user = result.scalar_one_or_none()
+    try:
+        user_id_int = int(user_id)
+    except ValueError:
+        raise credentials_exception
+
+    # Сначала смотрим в кэш, в БД идем только при промахе
+    cached = user_cache.get(user_id_int)
+    if cached is None:
+        result = await db.execute(
+            select(User.id, User.nickname, User.email, User.role, User.token_version)
+            .where(User.id == user_id_int)
+        )
+        row = result.one_or_none()
 
-    if user is None:
+        if row is None:
+            raise credentials_exception
+
+        cached = dict(row._mapping)
+        user_cache.set(user_id_int, cached)
+
+    # Токен выдан до отзыва (смена пароля): версия в БД уже больше.
+    # Токены без tv выданы до появления отзыва и соответствуют версии 0
+    if payload.get(TOKEN_VERSION_CLAIM, 0) != cached["token_version"]:
         raise credentials_exception
 
-    return user
+    # Отдельный объект на каждый запрос, не привязанный к сессии.
+    # Хеша пароля в нем нет - кому он нужен, читают его из БД.
+    return User(**cached)
 
 # Авторизация (только администратор)
 async def get_current_admin(
@@ -57,4 +85,19 @@ async def get_current_admin(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Недостаточно прав доступа"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+# Сессии для чтения (реплики, если заданы DATABASE_REPLICA_URLS)
+async def get_read_session(
+    current_user: User = Depends(get_current_user)
+) -> AsyncGenerator[AsyncSession, None]:
+    # Только что писавший пользователь читает из основной БД (read-your-writes);
+    # так же - если его данные (у админа - любые) недавно изменил кто-то другой
+    maker = read_session_maker(current_user.id, changed_at=last_change_at(current_user))
+    async with maker() as session:
+        yield session
+
+async def get_replica_session() -> AsyncGenerator[AsyncSession, None]:
+    # Без привязки к пользователю: для отчетов, где отставание реплики не важно
+    async with read_session_maker(sticky=False)() as session:
+        yield session
@@ -0,0 +1,82 @@
+# etag.py
+import hashlib
+import os
+import time
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+from fastapi import Request, Response, status
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.task import tasks_versions
+from models.user import User
+
+load_dotenv()
+
+# Поля вроде days_until_deadline зависят от текущего времени, поэтому
+# ETag таких ответов живет не дольше одного интервала
+ETAG_TIME_BUCKET_SECONDS = int(os.getenv("ETAG_TIME_BUCKET_SECONDS", "60"))
+
+
+def user_scope(current_user) -> str:
+    # Админ видит все задачи - у него общая версия данных
+    if current_user.role.value == "admin":
+        return "all"
+    return f"user:{current_user.id}"
+
+
+async def tasks_version(db: AsyncSession, current_user) -> str:
+    """
+    Версия данных, которую ведут триггеры tasks_user_counters_*:
+    у пользователя - users.tasks_version (по первичному ключу),
+    у админа - сумма по TASKS_VERSION_SLOTS строкам tasks_versions.
+    """
+    if current_user.role.value == "admin":
+        query = select(func.coalesce(func.sum(tasks_versions.c.version), 0))
+    else:
+        query = select(User.tasks_version).where(User.id == current_user.id)
+    return str(await db.scalar(query))
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode(),
+        digest_size=12
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Слабое сравнение: префикс W/ не учитываем
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+async def check_etag(
+    request: Request,
+    db: AsyncSession,
+    current_user,
+    time_dependent: bool = True,
+) -> Tuple[str, Optional[Response]]:
+    """
+    Считает ETag ответа до загрузки строк.
+    Если клиент прислал тот же ETag - возвращает готовый 304.
+    """
+    version = await tasks_version(db, current_user)
+    bucket = int(time.time() // ETAG_TIME_BUCKET_SECONDS) if time_dependent else ""
+    etag = make_etag(
+        user_scope(current_user),
+        request.url.path,
+        request.url.query,
+        version,
+        bucket,
+    )
+
+    if etag_matches(request, etag):
+        return etag, Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return etag, None
@@ -0,0 +1,70 @@
+# import_tasks.py
+import argparse
+import asyncio
+import json
+import sys
+
+from importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, ImportReport, import_task_stream, resolve_owner
+
+
+def print_progress(report: ImportReport):
+    print(
+        f"   прочитано {report.total}, загружено {report.imported}, "
+        f"ошибок {report.failed} ({report.rows_per_second:,.0f} строк/с)"
+    )
+
+
+def detect_format(path: str) -> str:
+    if path.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+async def main(args):
+    owner_id = await resolve_owner(user_id=args.user_id, email=args.email)
+    if owner_id is None:
+        print("❌ Пользователь-владелец не найден")
+        return 1
+
+    source_format = args.format or detect_format(args.path)
+    print(f"📥 Импорт задач из {args.path} ({source_format}) для пользователя {owner_id}...")
+
+    if args.path == "-":
+        stream = sys.stdin
+        report = await import_task_stream(
+            stream, source_format, owner_id, args.batch_size, on_progress=print_progress
+        )
+    else:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = await import_task_stream(
+                stream, source_format, owner_id, args.batch_size, on_progress=print_progress
+            )
+
+    if args.errors_file:
+        with open(args.errors_file, "w", encoding="utf-8") as file:
+            for error in report.errors:
+                file.write(json.dumps(error, ensure_ascii=False) + "\n")
+    else:
+        for error in report.errors[:20]:
+            print(f"   ⚠️  строка {error['row']}: {error['errors']}")
+        if report.failed > 20:
+            print(f"   ... и еще {report.failed - 20}, полный список: --errors-file")
+
+    print(
+        f"🎉 Загружено {report.imported} из {report.total} "
+        f"за {report.duration_seconds:.1f} с, ошибок: {report.failed}"
+    )
+    return 0 if not report.failed else 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Массовый импорт задач из CSV или NDJSON через COPY")
+    parser.add_argument("path", help="файл CSV/NDJSON или - для stdin")
+    owner = parser.add_mutually_exclusive_group(required=True)
+    owner.add_argument("--user-id", type=int, help="id владельца задач")
+    owner.add_argument("--email", help="email владельца задач")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="по умолчанию - по расширению файла")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--errors-file", help="куда записать ошибки по строкам (NDJSON)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args)))
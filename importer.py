@@ -0,0 +1,219 @@
+# importer.py
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple, Union
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from database import engine, async_session_maker, mark_user_write
+from models.user import User
+from schemas import TaskCreate
+from invalidation import notify_statement, tasks_changed
+from utils import determine_quadrant, to_naive_utc, urgency_boundary
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Строк в одной пачке COPY; каждая пачка - отдельная транзакция
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "10000"))
+IMPORT_FORMATS = ("csv", "ndjson")
+
+COPY_COLUMNS = (
+    "title", "description", "is_important", "deadline_at", "quadrant",
+    "completed", "created_at", "updated_at", "user_id",
+)
+
+# Номер строки источника и словарь полей (или текст ошибки разбора)
+SourceRow = Tuple[int, Union[dict, str]]
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    imported: int = 0
+    failed: int = 0
+    # Ошибки по строкам: {"row": номер, "errors": текст}
+    errors: List[dict] = field(default_factory=list)
+    # Сколько ошибок хранить в отчете; None - все
+    error_limit: Optional[int] = None
+    duration_seconds: float = 0.0
+
+    def add_error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if self.error_limit is None or len(self.errors) < self.error_limit:
+            self.errors.append({"row": row, "errors": message})
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.duration_seconds if self.duration_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "duration_seconds": round(self.duration_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def iter_source_rows(stream: TextIO, source_format: str) -> Iterator[SourceRow]:
+    """
+    Построчно читает CSV (с заголовком) или NDJSON.
+    Пустые значения CSV пропускаются, чтобы сработали умолчания TaskCreate.
+    """
+    if source_format == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, {key: value for key, value in row.items() if key and value not in ("", None)}
+        return
+
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, f"некорректный JSON: {exc}"
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def read_batch(rows: Iterator[SourceRow], batch_size: int, owner_id: int):
+    """
+    Разбирает и проверяет очередную пачку строк.
+    Квадранты считаются от одной границы срочности на всю пачку.
+    Возвращает (записи для COPY, ошибки [(номер, текст)], прочитано строк).
+    """
+    now = datetime.utcnow()
+    boundary = urgency_boundary(now)
+    records = []
+    errors = []
+    seen = 0
+
+    for number, row in itertools.islice(rows, batch_size):
+        seen += 1
+        if isinstance(row, str):
+            errors.append((number, row))
+            continue
+        try:
+            task = TaskCreate.model_validate(row)
+        except ValidationError as exc:
+            errors.append((number, format_validation_error(exc)))
+            continue
+
+        deadline_at = to_naive_utc(task.deadline_at) if task.deadline_at else None
+        is_urgent = deadline_at is not None and deadline_at < boundary
+        records.append((
+            task.title,
+            task.description,
+            task.is_important,
+            deadline_at,
+            determine_quadrant(task.is_important, is_urgent),
+            False,
+            now,
+            now,
+            owner_id,
+        ))
+
+    return records, errors, seen
+
+
+async def resolve_owner(user_id: Optional[int] = None, email: Optional[str] = None) -> Optional[int]:
+    async with async_session_maker() as session:
+        query = select(User.id)
+        query = query.where(User.id == user_id) if user_id is not None else query.where(User.email == email)
+        return await session.scalar(query)
+
+
+async def notify_tasks_imported(owner_id: int) -> None:
+    """
+    NOTIFY воркерам API отдельной транзакцией: импорт из CLI идет вне API,
+    и шины инвалидации в процессе нет. Ошибка отправки не отменяет импорт.
+    """
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(notify_statement("tasks", owner_id))
+    except Exception as exc:
+        logger.warning("Не удалось оповестить воркеры об импорте: %s", exc)
+
+
+async def import_task_stream(
+    stream: TextIO,
+    source_format: str,
+    owner_id: int,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    error_limit: Optional[int] = None,
+    on_progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """
+    Загружает задачи из потока через COPY пачками по batch_size.
+    Разбор следующей пачки идет в потоке, пока текущая пишется в БД.
+    Строки с ошибками пропускаются и попадают в отчет, остальные загружаются.
+    """
+    if source_format not in IMPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат: {source_format}")
+
+    rows = iter_source_rows(stream, source_format)
+    report = ImportReport(error_limit=error_limit)
+    started = time.perf_counter()
+
+    def next_batch():
+        return asyncio.ensure_future(asyncio.to_thread(read_batch, rows, batch_size, owner_id))
+
+    pending = next_batch()
+    try:
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            driver = raw.driver_connection
+
+            while True:
+                records, errors, seen = await pending
+                if not seen:
+                    break
+                pending = next_batch()
+
+                if records:
+                    await driver.copy_records_to_table(
+                        "tasks", records=records, columns=COPY_COLUMNS
+                    )
+
+                report.total += seen
+                report.imported += len(records)
+                for number, message in errors:
+                    report.add_error(number, message)
+                report.duration_seconds = time.perf_counter() - started
+                logger.debug("Импорт: прочитано %s, загружено %s", report.total, report.imported)
+                if on_progress is not None:
+                    on_progress(report)
+    finally:
+        # Поток разбора не прервать - дожидаемся его, чтобы не читать закрытый файл
+        await asyncio.gather(pending, return_exceptions=True)
+        # Каждая пачка фиксируется сразу: об уже загруженных сообщаем и при ошибке
+        if report.imported:
+            await notify_tasks_imported(owner_id)
+            tasks_changed(owner_id, broadcast=False)
+            mark_user_write(owner_id)
+
+    report.duration_seconds = time.perf_counter() - started
+    logger.info(
+        "Импорт задач для пользователя %s: %s из %s строк за %.1f с",
+        owner_id, report.imported, report.total, report.duration_seconds
+    )
+    return report
@@ -0,0 +1,239 @@
+# invalidation.py
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy import func, select
+
+from metrics import Counter, Histogram, register
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# ===== Версии данных задач =====
+# Версии в памяти воркера. Кэш ответов сравнивает с ними версию,
+# с которой построена запись: изменилась - запись устарела.
+# Изменения из других воркеров приходят по шине ниже.
+_epoch = 0
+_all_version = 0
+_user_versions: Dict[int, int] = {}
+# time.monotonic() последнего изменения: реплика может еще не догнать эти записи
+_epoch_changed_at = 0.0
+_all_changed_at = 0.0
+_user_changed_at: Dict[int, float] = {}
+
+
+def data_version(current_user) -> tuple:
+    """Версия данных, которые видит пользователь: свои задачи или (админ) все"""
+    if current_user.role.value == "admin":
+        return (_epoch, "all", _all_version)
+    return (_epoch, _user_versions.get(current_user.id, 0))
+
+
+def last_change_at(current_user) -> float:
+    """Когда (time.monotonic) последний раз менялись данные, которые видит пользователь"""
+    if current_user.role.value == "admin":
+        return max(_epoch_changed_at, _all_changed_at)
+    return max(_epoch_changed_at, _user_changed_at.get(current_user.id, 0.0))
+
+
+def _bump_versions(user_id: Optional[int]) -> None:
+    global _epoch, _all_version, _epoch_changed_at, _all_changed_at
+    now = time.monotonic()
+    if user_id is None:
+        _epoch += 1
+        _epoch_changed_at = now
+        return
+    _user_versions[user_id] = _user_versions.get(user_id, 0) + 1
+    _all_version += 1
+    _user_changed_at[user_id] = now
+    _all_changed_at = now
+
+
+def tasks_changed(user_id: Optional[int], broadcast: bool = True) -> None:
+    """
+    Вызывается после commit записи задач.
+    user_id - владелец измененных задач; None - менялись задачи
+    разных пользователей (админ, фоновый пересчет), сбрасываются все версии.
+    broadcast=False - остальным воркерам сообщит сам вызывающий (pg_notify в своей транзакции).
+    """
+    _bump_versions(user_id)
+    if broadcast:
+        publish("tasks", user_id)
+
+
+# ===== Шина инвалидации (LISTEN/NOTIFY) =====
+INVALIDATION_CHANNEL = "cache_invalidation"
+CACHE_INVALIDATION_BUS = os.getenv("CACHE_INVALIDATION_BUS", "true").lower() in ("1", "true", "yes")
+# Как часто проверять соединение слушателя и максимум паузы между переподключениями
+INVALIDATION_PING_SECONDS = float(os.getenv("INVALIDATION_PING_SECONDS", "15"))
+INVALIDATION_RECONNECT_MAX_SECONDS = float(os.getenv("INVALIDATION_RECONNECT_MAX_SECONDS", "30"))
+# Сообщения, ждущие отправки, пока нет соединения
+INVALIDATION_QUEUE_SIZE = 10000
+
+# Отличаем свои сообщения: локально они уже применены
+WORKER_ID = uuid.uuid4().hex
+
+INVALIDATION_MESSAGES = register(Counter(
+    "cache_invalidation_messages_total", "Сообщения шины инвалидации",
+    ("kind", "direction"),
+))
+INVALIDATION_RECONNECTS = register(Counter(
+    "cache_invalidation_reconnects_total", "Переподключения слушателя шины инвалидации",
+))
+INVALIDATION_LAG = register(Histogram(
+    "cache_invalidation_lag_seconds", "Задержка от отправки сообщения до применения в воркере",
+    ("kind",), buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+))
+
+# kind -> обработчики (user_id, data); reset - сброс всего после обрыва связи
+_handlers: Dict[str, List[Callable[[Optional[int], Optional[dict]], None]]] = {
+    "tasks": [lambda user_id, data: _bump_versions(user_id)],
+}
+_reset_handlers: List[Callable[[], None]] = [lambda: _bump_versions(None)]
+
+_queue: Optional[asyncio.Queue] = None
+_bus_task: Optional[asyncio.Task] = None
+
+
+def register_handler(kind: str, handler, reset: Optional[Callable[[], None]] = None) -> None:
+    """Модуль с локальным кэшем подписывается на свои сообщения"""
+    _handlers.setdefault(kind, []).append(handler)
+    if reset is not None:
+        _reset_handlers.append(reset)
+
+
+def register_reset(reset: Callable[[], None]) -> None:
+    """Кэш без своих сообщений, который тоже надо сбросить после обрыва связи"""
+    _reset_handlers.append(reset)
+
+
+def encode_message(kind: str, user_id: Optional[int], data: Optional[dict] = None) -> str:
+    return json.dumps({
+        "kind": kind,
+        "user_id": user_id,
+        "data": data,
+        "origin": WORKER_ID,
+        "sent_at": time.time(),
+    }, separators=(",", ":"))
+
+
+def notify_statement(kind: str, user_id: Optional[int], data: Optional[dict] = None):
+    """
+    pg_notify для выполнения в своей транзакции: сообщение уйдет при commit.
+    Для скриптов вне API (make_admin.py), где шина не запущена.
+    """
+    return select(func.pg_notify(INVALIDATION_CHANNEL, encode_message(kind, user_id, data)))
+
+
+def publish(kind: str, user_id: Optional[int], data: Optional[dict] = None) -> None:
+    """Отправить остальным воркерам; без запущенной шины - ничего не делает"""
+    if _queue is None:
+        return
+    try:
+        _queue.put_nowait(encode_message(kind, user_id, data))
+    except asyncio.QueueFull:
+        # Соединения давно нет: после переподключения все кэши и так сбросятся
+        INVALIDATION_MESSAGES.inc((kind, "dropped"))
+
+
+def _on_notification(connection, pid, channel, payload: str) -> None:
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning("Некорректное сообщение шины инвалидации: %r", payload)
+        return
+    if message.get("origin") == WORKER_ID:
+        return
+
+    kind = message.get("kind")
+    handlers = _handlers.get(kind)
+    if not handlers:
+        return
+    for handler in handlers:
+        handler(message.get("user_id"), message.get("data"))
+    INVALIDATION_MESSAGES.inc((kind, "received"))
+    INVALIDATION_LAG.observe((kind,), max(0.0, time.time() - message.get("sent_at", time.time())))
+
+
+def _reset_local_caches() -> None:
+    # Пока связи не было, сообщения других воркеров могли потеряться
+    for reset in _reset_handlers:
+        reset()
+
+
+def _wake_sender(connection) -> None:
+    # Обрыв соединения будит цикл отправки пустым сообщением
+    if _queue is not None and not _queue.full():
+        _queue.put_nowait(None)
+
+
+async def _run_bus(connect: Callable[[], Awaitable]) -> None:
+    delay = 1.0
+    first = True
+    unsent: Optional[str] = None
+    while True:
+        connection = None
+        try:
+            connection = await connect()
+            connection.add_termination_listener(_wake_sender)
+            await connection.add_listener(INVALIDATION_CHANNEL, _on_notification)
+            if not first:
+                _reset_local_caches()
+                logger.info("Шина инвалидации переподключена")
+            first = False
+            delay = 1.0
+
+            while True:
+                if unsent is None:
+                    try:
+                        unsent = await asyncio.wait_for(_queue.get(), timeout=INVALIDATION_PING_SECONDS)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(connection.execute("SELECT 1"), timeout=INVALIDATION_PING_SECONDS)
+                        continue
+                if unsent is None:
+                    if connection.is_closed():
+                        raise ConnectionError("соединение закрыто")
+                    continue
+                # Сообщение, не отправленное до обрыва, уйдет после переподключения
+                await connection.execute("SELECT pg_notify($1, $2)", INVALIDATION_CHANNEL, unsent)
+                INVALIDATION_MESSAGES.inc((json.loads(unsent)["kind"], "sent"))
+                unsent = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Шина инвалидации недоступна (%s), повтор через %.0f с", exc, delay)
+            INVALIDATION_RECONNECTS.inc()
+        finally:
+            if connection is not None and not connection.is_closed():
+                connection.terminate()
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, INVALIDATION_RECONNECT_MAX_SECONDS)
+
+
+def start_invalidation_bus(connect: Callable[[], Awaitable]) -> None:
+    """connect() -> отдельное asyncpg-соединение (database.raw_connect)"""
+    global _queue, _bus_task
+    if not CACHE_INVALIDATION_BUS or _bus_task is not None:
+        return
+    _queue = asyncio.Queue(maxsize=INVALIDATION_QUEUE_SIZE)
+    _bus_task = asyncio.create_task(_run_bus(connect))
+
+
+async def stop_invalidation_bus() -> None:
+    global _queue, _bus_task
+    if _bus_task is None:
+        return
+    _bus_task.cancel()
+    try:
+        await _bus_task
+    except asyncio.CancelledError:
+        pass
+    _bus_task = None
+    _queue = None
@@ -1,6 +1,41 @@
 # main.py
-from fastapi import FastAPI
+import time
+
+# Отсчет холодного старта: импорт модулей входит в фазу import
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
+import os
+from contextlib import contextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from auth_utils import PasswordHashingBusy, token_cache
+from requadrant import start_requadrant_scheduler, stop_requadrant_scheduler
+from database import DB_PROFILE, engine, raw_connect, replica_engines, pool_status
+from invalidation import start_invalidation_bus, stop_invalidation_bus
+from migrations import auto_migrate, check_schema_version
+from cache import user_cache
+from response_cache import response_cache
+from metrics import MetricsMiddleware, CallbackCounter, CallbackGauge, Gauge, instrument_engine, register, render_metrics
+from timing import SERVER_TIMING_ENABLED, ServerTimingMiddleware
+from routers.tasks import router as tasks_router
+from routers.stats import router as stats_router
+from routers.auth import router as auth_router
+from routers.admin import router as admin_router
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Недостающие миграции при старте применяются только там, где это разрешено
+# (по умолчанию в dev); иначе воркер с устаревшей схемой не стартует
+SCHEMA_AUTO_MIGRATE = os.getenv(
+    "SCHEMA_AUTO_MIGRATE", "true" if DB_PROFILE == "dev" else "false"
+).lower() in ("1", "true", "yes")
 
 app = FastAPI(
     title="ToDo API",
@@ -17,22 +52,118 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing и поиск N+1 (по флагу SERVER_TIMING); внутри MetricsMiddleware
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Метрики: задержки по маршрутам, запросы в обработке, SQL на запрос
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine)
+
+def pool_connections() -> dict:
+    status_now = pool_status()
+    return {(state,): status_now[state] for state in ("checked_out", "checked_in", "overflow")}
+
+register(CallbackGauge(
+    "db_pool_connections", "Соединения пула БД", ("state",), pool_connections,
+))
+register(CallbackCounter(
+    "user_cache_events_total", "Попадания и промахи кэша пользователей", ("event",),
+    lambda: {
+        ("hit",): user_cache.hits,
+        ("miss",): user_cache.misses,
+        ("eviction",): user_cache.evictions,
+    },
+))
+register(CallbackCounter(
+    "jwt_cache_events_total", "Попадания и промахи кэша проверенных JWT", ("event",),
+    lambda: {
+        ("hit",): token_cache.hits,
+        ("miss",): token_cache.misses,
+        ("eviction",): token_cache.evictions,
+    },
+))
+register(CallbackCounter(
+    "response_cache_events_total", "Попадания, промахи и вытеснения кэша ответов", ("event",),
+    lambda: {
+        ("hit",): response_cache.hits,
+        ("miss",): response_cache.misses,
+        ("stale",): response_cache.stale,
+        ("eviction",): response_cache.evictions,
+    },
+))
+register(CallbackGauge(
+    "response_cache_bytes", "Занято памяти кэшем ответов", (),
+    lambda: {(): response_cache.size_bytes},
+))
+
+# Роутеры подключаются при импорте: маршруты есть еще до startup
+app.include_router(tasks_router, prefix="/api/v2")
+app.include_router(stats_router, prefix="/api/v2")
+app.include_router(auth_router, prefix="/api/v2")
+app.include_router(admin_router, prefix="/api/v2")
+
+# ===== Время старта по фазам =====
+STARTUP_PHASE_TIME = register(Gauge(
+    "startup_phase_seconds", "Длительность фаз старта воркера", ("phase",),
+))
+startup_phases: dict = {}
+
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        startup_phases[name] = elapsed
+        STARTUP_PHASE_TIME.set((name,), elapsed)
+
+startup_phases["import"] = time.perf_counter() - _IMPORT_STARTED
+STARTUP_PHASE_TIME.set(("import",), startup_phases["import"])
+
+# Пул хеширования паролей перегружен - просим клиента повторить позже
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Сервер перегружен, повторите попытку позже"},
+        headers={"Retry-After": "1"}
+    )
+
 @app.on_event("startup")
 async def startup():
-    from database import init_db
-    await init_db()
+    started = time.perf_counter()
 
-    # Импортируем роутеры
-    from routers.tasks import router as tasks_router
-    from routers.stats import router as stats_router
-    from routers.auth import router as auth_router
-    from routers.admin import router as admin_router
+    # Вместо create_all на каждом старте - сверка версии схемы
+    with startup_phase("schema"):
+        if SCHEMA_AUTO_MIGRATE:
+            version = await auto_migrate()
+        else:
+            version = await check_schema_version()
 
-    # Подключаем роутеры
-    app.include_router(tasks_router, prefix="/api/v2")
-    app.include_router(stats_router, prefix="/api/v2")
-    app.include_router(auth_router, prefix="/api/v2")
-    app.include_router(admin_router, prefix="/api/v2")
+    # Фоновый пересчет квадрантов по приближающимся дедлайнам
+    with startup_phase("scheduler"):
+        start_requadrant_scheduler()
+
+    # Сброс кэшей по изменениям из других воркеров и скриптов (LISTEN/NOTIFY)
+    with startup_phase("invalidation"):
+        start_invalidation_bus(raw_connect)
+
+    startup_phases["startup"] = time.perf_counter() - started
+    STARTUP_PHASE_TIME.set(("startup",), startup_phases["startup"])
+    logger.info(
+        "Воркер готов (схема v%s): %s",
+        version,
+        ", ".join(f"{name} {seconds * 1000:.1f} мс" for name, seconds in startup_phases.items())
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_requadrant_scheduler()
+    await stop_invalidation_bus()
 
 @app.get("/")
 async def root():
@@ -42,6 +173,10 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
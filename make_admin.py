@@ -3,6 +3,14 @@ import asyncio
 from sqlalchemy import select, update
 from database import async_session_maker
 from models.user import User, UserRole
+from cache import invalidate_user, USER_CACHE_TTL_SECONDS
+from invalidation import notify_statement
+
+def print_cache_notice():
+    # Воркеры API получают NOTIFY при commit и сбрасывают запись сразу;
+    # без шины инвалидации (CACHE_INVALIDATION_BUS=false) - по TTL
+    print("ℹ️  Запущенный API применит новую роль сразу "
+          f"(без шины инвалидации - в течение {USER_CACHE_TTL_SECONDS:.0f} сек.)")
 
 async def set_admin_user():
     """Простой скрипт для назначения администратора"""
@@ -45,14 +53,19 @@ async def set_admin_user():
                         demote = input("   Понизить до обычного пользователя? (y/n): ").lower() == 'y'
                         if demote:
                             selected_user.role = UserRole.USER
+                            await session.execute(notify_statement("user", selected_user.id))
                             await session.commit()
+                            invalidate_user(selected_user.id)
                             print(f"✅ Пользователь {selected_user.nickname} теперь обычный пользователь")
+                            print_cache_notice()
                         else:
                             print("⏸️  Роль не изменена")
                     else:
                         # Назначаем админом
                         selected_user.role = UserRole.ADMIN
+                        await session.execute(notify_statement("user", selected_user.id))
                         await session.commit()
+                        invalidate_user(selected_user.id)
                         print(f"\n🎉 ПОЛЬЗОВАТЕЛЬ НАЗНАЧЕН АДМИНИСТРАТОРОМ!")
                         print(f"   👑 {selected_user.nickname}")
                         print(f"   📧 {selected_user.email}")
@@ -61,6 +74,7 @@ async def set_admin_user():
                         # Показываем подтверждение
                         await session.refresh(selected_user)
                         print(f"\n✅ Подтверждение: роль изменена на {selected_user.role.value}")
+                        print_cache_notice()
                 else:
                     print("❌ Неверный номер пользователя")
                     
@@ -0,0 +1,253 @@
+# metrics.py
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+from sqlalchemy import event
+
+# Все коллекторы меняются только из потока event loop воркера:
+# операции - обычные присваивания в dict, без блокировок
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+            for labels, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple, value: float) -> None:
+        self.values[labels] = value
+
+
+class CallbackGauge(Counter):
+    """Значения снимаются при каждом запросе /metrics"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], callback: Callable[[], Dict[tuple, float]]):
+        super().__init__(name, help_text, labels)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        self.values = self.callback()
+        return super().render()
+
+
+class CallbackCounter(CallbackGauge):
+    """Монотонные счетчики, которые ведет сам объект (попадания кэша и т.п.)"""
+    kind = "counter"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [счетчики по корзинам (не накопленные), сумма, количество]
+        self.values: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        inf = 'le="+Inf"'
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, inf)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+
+REGISTRY: list = []
+
+
+def register(collector):
+    REGISTRY.append(collector)
+    return collector
+
+
+def render_metrics() -> str:
+    lines = []
+    for collector in REGISTRY:
+        lines.append(f"# HELP {collector.name} {collector.help_text}")
+        lines.append(f"# TYPE {collector.name} {collector.kind}")
+        lines.extend(collector.render())
+    return "\n".join(lines) + "\n"
+
+
+# ===== Метрики HTTP и БД =====
+HTTP_REQUESTS = register(Counter(
+    "http_requests_total", "Количество HTTP-запросов",
+    ("prefix", "route", "method", "status"),
+))
+HTTP_LATENCY = register(Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса",
+    ("prefix", "route"),
+))
+HTTP_IN_FLIGHT = register(Gauge(
+    "http_requests_in_flight", "Запросы в обработке", ("prefix",),
+))
+DB_QUERIES = register(Counter(
+    "db_queries_total", "Количество SQL-запросов по маршрутам", ("prefix", "route"),
+))
+DB_REQUEST_TIME = register(Histogram(
+    "db_request_duration_seconds", "Суммарное время SQL за один HTTP-запрос",
+    ("prefix", "route"),
+))
+PASSWORD_HASH_TIME = register(Histogram(
+    "password_hash_duration_seconds", "Время bcrypt-хеширования и проверки паролей",
+    ("operation",), buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+))
+
+
+# ===== Контекст текущего запроса =====
+@dataclass
+class RequestStats:
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    auth_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+    # Счетчики по форме SQL; None - поиск N+1 выключен (см. timing.py)
+    statements: Optional[Dict[str, int]] = None
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+@contextmanager
+def timed(field: str):
+    """Добавляет время блока к полю RequestStats текущего запроса (auth_seconds, ...)"""
+    stats = current_request.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(stats, field, getattr(stats, field) + time.perf_counter() - started)
+
+
+_ROUTE_PREFIX = re.compile(r"^/api/v\d+(/[^/]+)")
+# Значение метки - только из известного списка: произвольный путь
+# от клиента не должен порождать новый временной ряд
+ROUTE_PREFIXES = frozenset({"/tasks", "/stats", "/auth", "/admin"})
+
+
+def route_prefix(path: str) -> str:
+    """/api/v2/tasks/5 -> /tasks; все остальное - other"""
+    match = _ROUTE_PREFIX.match(path)
+    if match and match.group(1) in ROUTE_PREFIXES:
+        return match.group(1)
+    return "other"
+
+
+def instrument_engine(engine) -> None:
+    """Считает количество и время SQL-запросов в контексте текущего HTTP-запроса"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+            if stats.statements is not None:
+                stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: счетчики, гистограммы задержек и запросы в обработке"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        prefix = route_prefix(scope["path"])
+        stats = RequestStats()
+        token = current_request.set(stats)
+        response_status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response_status[0] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc((prefix,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec((prefix,))
+            # Шаблон маршрута (/api/v2/tasks/{task_id}) известен после роутинга
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc((prefix, route, scope["method"], str(response_status[0])))
+            HTTP_LATENCY.observe((prefix, route), elapsed)
+            DB_QUERIES.inc((prefix, route), stats.db_queries)
+            DB_REQUEST_TIME.observe((prefix, route), stats.db_seconds)
+            current_request.reset(token)
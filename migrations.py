@@ -0,0 +1,338 @@
+# migrations.py
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from database import engine, init_db
+from models.task import (
+    SEARCH_TRIGGER_FUNCTION_SQL, SEARCH_TRIGGER_SQL,
+    COUNTERS_CHANGES, COUNTERS_FUNCTIONS_SQL, COUNTERS_TRIGGERS_SQL, TASKS_VERSION_SLOTS_SQL,
+    counters_function_sql,
+)
+
+
+@dataclass
+class Migration:
+    """Один версионированный шаг схемы"""
+    version: int
+    name: str
+    statements: List[str] = field(default_factory=list)
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции,
+    # такие шаги выполняются в режиме AUTOCOMMIT
+    concurrently: bool = False
+
+
+MIGRATIONS: List[Migration] = [
+    # Таблицы users/tasks, внешний ключ и idx_tasks_user_id
+    # создает recreate_tables.migrate_database()
+    Migration(version=1, name="baseline"),
+    Migration(
+        version=2,
+        name="tasks_access_indexes",
+        statements=[
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_completed "
+            "ON tasks (user_id, completed)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_quadrant "
+            "ON tasks (user_id, quadrant)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_deadline_open "
+            "ON tasks (user_id, deadline_at) WHERE completed = false",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_created_at_id "
+            "ON tasks (created_at, id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_created_at_id "
+            "ON tasks (user_id, created_at, id)",
+        ],
+        concurrently=True,
+    ),
+    Migration(
+        version=3,
+        name="tasks_search_vector",
+        statements=[
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            # Колонка без DEFAULT - без перезаписи таблицы;
+            # существующие строки заполняет rebuild_search_index.py
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector",
+            SEARCH_TRIGGER_FUNCTION_SQL,
+            "DROP TRIGGER IF EXISTS tasks_search_vector_trg ON tasks",
+            SEARCH_TRIGGER_SQL,
+        ],
+    ),
+    Migration(
+        version=4,
+        name="tasks_search_indexes",
+        statements=[
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_search_vector "
+            "ON tasks USING gin (search_vector)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_title_trgm "
+            "ON tasks USING gin (title gin_trgm_ops)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_description_trgm "
+            "ON tasks USING gin (description gin_trgm_ops)",
+        ],
+        concurrently=True,
+    ),
+    Migration(
+        version=5,
+        name="tasks_deadline_open_index",
+        statements=[
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_deadline_open "
+            "ON tasks (deadline_at) WHERE completed = false",
+        ],
+        concurrently=True,
+    ),
+    Migration(
+        version=6,
+        name="tasks_updated_at",
+        statements=[
+            # now() стабильна в пределах транзакции: значение по умолчанию
+            # сохраняется в каталоге, таблица не перезаписывается (PG 11+)
+            "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS updated_at "
+            "TIMESTAMP NOT NULL DEFAULT now()",
+        ],
+    ),
+    Migration(
+        version=7,
+        name="tasks_updated_at_indexes",
+        # Удалены миграцией 12
+        statements=[
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_user_id_updated_at "
+            "ON tasks (user_id, updated_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_updated_at "
+            "ON tasks (updated_at)",
+        ],
+        concurrently=True,
+    ),
+    Migration(
+        version=8,
+        name="users_task_counters",
+        # Одна транзакция: CREATE TRIGGER блокирует запись в tasks до commit,
+        # поэтому пересчет ниже не разойдется с триггерами
+        statements=[
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS task_count INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS open_count INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS completed_count INTEGER NOT NULL DEFAULT 0",
+            # Функции без версий данных: колонок для них еще нет (миграция 10)
+            *[counters_function_sql(name, data_version=False) for name in COUNTERS_CHANGES],
+            "DROP TRIGGER IF EXISTS tasks_user_counters_insert ON tasks",
+            "DROP TRIGGER IF EXISTS tasks_user_counters_update ON tasks",
+            "DROP TRIGGER IF EXISTS tasks_user_counters_delete ON tasks",
+            *COUNTERS_TRIGGERS_SQL,
+            """
+            UPDATE users u
+            SET task_count = counts.total,
+                open_count = counts.total - counts.done,
+                completed_count = counts.done
+            FROM (
+                SELECT user_id, count(*) AS total, count(*) FILTER (WHERE completed) AS done
+                FROM tasks
+                GROUP BY user_id
+            ) counts
+            WHERE u.id = counts.user_id
+            """,
+        ],
+    ),
+    Migration(
+        version=9,
+        name="users_counter_indexes",
+        statements=[
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_task_count_id "
+            "ON users (task_count, id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_open_count_id "
+            "ON users (open_count, id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_completed_count_id "
+            "ON users (completed_count, id)",
+        ],
+        concurrently=True,
+    ),
+    Migration(
+        version=10,
+        name="tasks_data_versions",
+        # Версии для ETag вместо max(updated_at) + count: now() - время начала
+        # транзакции, и запись, закоммиченная позже, может его не сдвинуть
+        statements=[
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS tasks_version BIGINT NOT NULL DEFAULT 0",
+            """
+            CREATE TABLE IF NOT EXISTS tasks_versions (
+                slot SMALLINT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            )
+            """,
+            TASKS_VERSION_SLOTS_SQL,
+            # Версии поднимают те же функции счетчиков (триггеры миграции 8)
+            *COUNTERS_FUNCTIONS_SQL,
+        ],
+    ),
+    Migration(
+        version=11,
+        name="users_token_version",
+        statements=[
+            "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0",
+        ],
+    ),
+    Migration(
+        version=12,
+        name="drop_tasks_updated_at_indexes",
+        # Индексы миграции 7 служили ETag по max(updated_at); версии теперь
+        # ведут триггеры (миграция 10). updated_at меняется при каждом UPDATE,
+        # и индекс по нему лишал обновления задач HOT
+        statements=[
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_user_id_updated_at",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_updated_at",
+        ],
+        concurrently=True,
+    ),
+    Migration(
+        version=13,
+        name="merge_tasks_version_triggers",
+        # Раньше версии вели отдельные триггеры tasks_data_version_*: два UPDATE
+        # одной строки users на оператор. Теперь все делает функция счетчиков
+        statements=[
+            *COUNTERS_FUNCTIONS_SQL,
+            "DROP TRIGGER IF EXISTS tasks_data_version_insert ON tasks",
+            "DROP TRIGGER IF EXISTS tasks_data_version_update ON tasks",
+            "DROP TRIGGER IF EXISTS tasks_data_version_delete ON tasks",
+            "DROP FUNCTION IF EXISTS tasks_data_version_insert()",
+            "DROP FUNCTION IF EXISTS tasks_data_version_update()",
+            "DROP FUNCTION IF EXISTS tasks_data_version_delete()",
+        ],
+    ),
+]
+
+LATEST_VERSION = max(migration.version for migration in MIGRATIONS)
+
+logger = logging.getLogger(__name__)
+
+# Один процесс за раз применяет миграции при автоматическом обновлении схемы
+MIGRATION_LOCK_KEY = 7310002
+
+
+class SchemaVersionError(RuntimeError):
+    """Схема базы старее, чем ожидает код"""
+
+
+async def ensure_migrations_table(conn: AsyncConnection) -> None:
+    await conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+    """))
+
+
+async def applied_versions(conn: AsyncConnection) -> Set[int]:
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    return {row.version for row in result}
+
+
+async def current_version(conn: AsyncConnection) -> Optional[int]:
+    """Версия схемы; None - таблицы schema_migrations еще нет"""
+    exists = await conn.scalar(text("SELECT to_regclass('schema_migrations') IS NOT NULL"))
+    if not exists:
+        return None
+    return await conn.scalar(text("SELECT coalesce(max(version), 0) FROM schema_migrations"))
+
+
+async def check_schema_version() -> int:
+    """
+    Проверка при старте воркера: два запроса к каталогу вместо create_all.
+    Схема новее кода допустима (раскатка новой версии идет по воркерам).
+    """
+    async with engine.connect() as conn:
+        version = await current_version(conn)
+
+    if version is None or version < LATEST_VERSION:
+        raise SchemaVersionError(
+            f"Версия схемы БД {version}, код ожидает {LATEST_VERSION}: "
+            "выполните python recreate_tables.py"
+        )
+    if version > LATEST_VERSION:
+        logger.warning("Схема БД (версия %s) новее кода (%s)", version, LATEST_VERSION)
+    return version
+
+
+async def auto_migrate() -> int:
+    """
+    Для dev и тестовых стендов. Пустая база - create_all и отметка всех версий
+    (create_all создает ту же схему, что и миграции), иначе - недостающие шаги.
+    Воркеры, стартующие одновременно, ждут друг друга на advisory lock.
+    """
+    async with engine.connect() as lock_conn:
+        await lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            async with engine.connect() as conn:
+                version = await current_version(conn)
+                has_tables = await conn.scalar(text("SELECT to_regclass('tasks') IS NOT NULL"))
+
+            if version is not None and version >= LATEST_VERSION:
+                return version
+
+            if not has_tables:
+                await init_db()
+                async with engine.begin() as conn:
+                    await ensure_migrations_table(conn)
+                    for migration in MIGRATIONS:
+                        await record_version(conn, migration)
+                logger.info("Схема создана через create_all, версия %s", LATEST_VERSION)
+                return LATEST_VERSION
+
+            return await apply_migrations()
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+async def record_version(conn: AsyncConnection, migration: Migration) -> None:
+    await conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name}
+    )
+
+
+async def drop_invalid_indexes(conn: AsyncConnection) -> None:
+    """
+    Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс,
+    а IF NOT EXISTS его потом пропустит. Удаляем такие индексы перед повтором.
+    """
+    result = await conn.execute(text("""
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE NOT i.indisvalid AND t.relname IN ('tasks', 'users');
+    """))
+    for row in result.fetchall():
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{row.relname}"'))
+        print(f"🧹 Удален невалидный индекс {row.relname}")
+
+
+async def apply_migrations() -> int:
+    """Применяет все еще не примененные шаги по порядку, возвращает текущую версию"""
+    async with engine.begin() as conn:
+        await ensure_migrations_table(conn)
+        done = await applied_versions(conn)
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+
+        print(f"🔄 Миграция {migration.version}: {migration.name}")
+        if migration.concurrently:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await drop_invalid_indexes(conn)
+                for statement in migration.statements:
+                    await conn.execute(text(statement))
+                await record_version(conn, migration)
+        else:
+            async with engine.begin() as conn:
+                for statement in migration.statements:
+                    await conn.execute(text(statement))
+                await record_version(conn, migration)
+        print(f"✅ Миграция {migration.version} применена")
+
+    return LATEST_VERSION
+
+
+if __name__ == "__main__":
+    asyncio.run(apply_migrations())
@@ -1,12 +1,179 @@
 # models/task.py
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Integer, BigInteger, SmallInteger, String, Boolean, DateTime, Text, ForeignKey,
+    Index, Float, Table, DDL, event, literal_column, or_, text
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from database import Base
 
+# ===== Полнотекстовый поиск =====
+# Конфигурация russian стеммит русские слова, латиницу обрабатывает как english
+SEARCH_CONFIG = "russian"
+
+# Выражение tsvector; {row} - префикс строки (NEW. в триггере, t. в пересборке)
+SEARCH_VECTOR_EXPR = (
+    "setweight(to_tsvector('" + SEARCH_CONFIG + "', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('" + SEARCH_CONFIG + "', coalesce({row}description, '')), 'B')"
+)
+
+SEARCH_TRIGGER_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION tasks_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := """ + SEARCH_VECTOR_EXPR.format(row="NEW.") + """;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+SEARCH_TRIGGER_SQL = """
+CREATE TRIGGER tasks_search_vector_trg
+BEFORE INSERT OR UPDATE OF title, description ON tasks
+FOR EACH ROW EXECUTE FUNCTION tasks_search_vector_update()
+"""
+
+# ===== Счетчики задач и версии данных в users =====
+# Триггеры уровня оператора с таблицами переходов: одно обновление users
+# на оператор (INSERT, пакетный UPDATE, COPY импорта), в той же транзакции.
+# Функция на каждое событие: таблица переходов есть не у всех событий.
+#
+# Тот же UPDATE users поднимает users.tasks_version - версию задач
+# пользователя для ETag, а tasks_versions - общую версию (для админа).
+# Версии растут в транзакции записи, поэтому меняются ровно тогда, когда
+# читатель видит новые данные. Общая версия - сумма по слотам: запись
+# блокирует только слот user_id % TASKS_VERSION_SLOTS, а не одну строку на всех
+TASKS_VERSION_SLOTS = 16
+
+COUNTERS_CHANGES = {
+    "insert": "SELECT user_id, 1 AS total, completed::int AS done FROM new_rows",
+    "update": (
+        "SELECT user_id, 1 AS total, completed::int AS done FROM new_rows "
+        "UNION ALL SELECT user_id, -1, -completed::int FROM old_rows"
+    ),
+    "delete": "SELECT user_id, -1 AS total, -completed::int AS done FROM old_rows",
+}
+
+COUNTERS_REFERENCING = {
+    "insert": "NEW TABLE AS new_rows",
+    "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "OLD TABLE AS old_rows",
+}
+
+
+def counters_function_sql(event_name: str, data_version: bool = True) -> str:
+    """data_version=False - функция до появления версий (миграция 8)"""
+    if not data_version:
+        return f"""
+CREATE OR REPLACE FUNCTION tasks_user_counters_{event_name}() RETURNS trigger AS $$
+BEGIN
+    UPDATE users u
+    SET task_count = u.task_count + delta.total,
+        completed_count = u.completed_count + delta.done,
+        open_count = u.open_count + delta.total - delta.done
+    FROM (
+        SELECT user_id, sum(total) AS total, sum(done) AS done
+        FROM ({COUNTERS_CHANGES[event_name]}) changes
+        GROUP BY user_id
+    ) delta
+    WHERE u.id = delta.user_id AND (delta.total <> 0 OR delta.done <> 0);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+    # Версия растет при любом изменении, даже если счетчики не сдвинулись;
+    # тогда индексированные колонки не меняются и обновление остается HOT
+    return f"""
+CREATE OR REPLACE FUNCTION tasks_user_counters_{event_name}() RETURNS trigger AS $$
+BEGIN
+    UPDATE users u
+    SET task_count = u.task_count + delta.total,
+        completed_count = u.completed_count + delta.done,
+        open_count = u.open_count + delta.total - delta.done,
+        tasks_version = u.tasks_version + 1
+    FROM (
+        SELECT user_id, sum(total) AS total, sum(done) AS done
+        FROM ({COUNTERS_CHANGES[event_name]}) changes
+        GROUP BY user_id
+    ) delta
+    WHERE u.id = delta.user_id;
+
+    UPDATE tasks_versions v
+    SET version = v.version + 1
+    FROM (
+        SELECT DISTINCT user_id % {TASKS_VERSION_SLOTS} AS slot
+        FROM ({COUNTERS_CHANGES[event_name]}) changes
+    ) changed
+    WHERE v.slot = changed.slot;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def counters_trigger_sql(event_name: str) -> str:
+    return f"""
+CREATE TRIGGER tasks_user_counters_{event_name}
+AFTER {event_name.upper()} ON tasks
+REFERENCING {COUNTERS_REFERENCING[event_name]}
+FOR EACH STATEMENT EXECUTE FUNCTION tasks_user_counters_{event_name}()
+"""
+
+
+COUNTERS_FUNCTIONS_SQL = [counters_function_sql(name) for name in COUNTERS_CHANGES]
+COUNTERS_TRIGGERS_SQL = [counters_trigger_sql(name) for name in COUNTERS_CHANGES]
+TASKS_VERSION_SLOTS_SQL = (
+    "INSERT INTO tasks_versions (slot, version) "
+    f"SELECT slot, 0 FROM generate_series(0, {TASKS_VERSION_SLOTS - 1}) AS slot "
+    "ON CONFLICT (slot) DO NOTHING"
+)
+
+tasks_versions = Table(
+    "tasks_versions",
+    Base.metadata,
+    Column("slot", SmallInteger, primary_key=True),
+    Column("version", BigInteger, nullable=False, server_default="0"),
+)
+
 class Task(Base):
     __tablename__ = "tasks"
+    # Те же индексы создают миграции в migrations.py
+    __table_args__ = (
+        Index("ix_tasks_user_id_completed", "user_id", "completed"),
+        Index("ix_tasks_user_id_quadrant", "user_id", "quadrant"),
+        Index(
+            "ix_tasks_user_id_deadline_open",
+            "user_id",
+            "deadline_at",
+            postgresql_where=text("completed = false"),
+        ),
+        # Окна дедлайнов по всем пользователям (админ, пересчет квадрантов)
+        Index(
+            "ix_tasks_deadline_open",
+            "deadline_at",
+            postgresql_where=text("completed = false"),
+        ),
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Полнотекстовый и триграммный поиск
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_tasks_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_tasks_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
+    # Серверные значения (created_at, updated_at) возвращаются в RETURNING
+    # самого INSERT/UPDATE, без отдельного refresh после commit
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(256), nullable=False)
@@ -17,6 +184,15 @@ class Task(Base):
     completed = Column(Boolean, default=False, nullable=False)  # Было is_completed
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
+    # Время последней записи; версия данных для ETag - users.tasks_version
+    updated_at = Column(
+        DateTime,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+    # Заполняется триггером tasks_search_vector_trg; в обычных запросах не грузим
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
     
     # Связь с пользователем
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -33,4 +209,60 @@ class Task(Base):
             return None
         today = datetime.utcnow().date()
         deadline_date = self.deadline_at.date()
-        return (deadline_date - today).days
\ No newline at end of file
+        return (deadline_date - today).days
+
+# create_all (init_db) создает то же, что миграции 3-4, 8 и 10: расширение до индексов, триггеры после
+event.listen(
+    Task.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Task.__table__,
+    "after_create",
+    DDL(SEARCH_TRIGGER_FUNCTION_SQL).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Task.__table__,
+    "after_create",
+    DDL(SEARCH_TRIGGER_SQL).execute_if(dialect="postgresql"),
+)
+for statement in COUNTERS_FUNCTIONS_SQL + COUNTERS_TRIGGERS_SQL:
+    event.listen(
+        Task.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="postgresql"),
+    )
+event.listen(
+    tasks_versions,
+    "after_create",
+    DDL(TASKS_VERSION_SLOTS_SQL).execute_if(dialect="postgresql"),
+)
+
+
+def search_filter(q: str):
+    """Совпадение по tsvector (GIN) или подстроке title/description (pg_trgm)"""
+    pattern = f"%{q}%"
+    return or_(
+        Task.search_vector.op("@@")(search_query(q)),
+        Task.title.ilike(pattern),
+        Task.description.ilike(pattern),
+    )
+
+
+def search_query(q: str):
+    return func.websearch_to_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q
+    )
+
+
+def search_rank(q: str):
+    """
+    Релевантность: ранг полнотекстового совпадения плюс похожесть заголовка.
+    Строки без search_vector (до rebuild_search_index.py) находятся через ILIKE -
+    их ранг 0, а не NULL: NULL встал бы первым в DESC и сломал бы курсор.
+    """
+    return (
+        func.coalesce(func.ts_rank_cd(Task.search_vector, search_query(q), type_=Float), 0.0)
+        + func.coalesce(func.similarity(Task.title, q, type_=Float), 0.0)
+    )
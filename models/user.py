@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum as SQLEnum
+from sqlalchemy import Column, BigInteger, Integer, String, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from database import Base
 import enum
@@ -10,6 +10,12 @@ class UserRole(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    # Сортировки /admin/users по счетчикам (keyset по (счетчик, id))
+    __table_args__ = (
+        Index("ix_users_task_count_id", "task_count", "id"),
+        Index("ix_users_open_count_id", "open_count", "id"),
+        Index("ix_users_completed_count_id", "completed_count", "id"),
+    )
 
     id = Column(
         Integer,
@@ -43,6 +49,16 @@ class User(Base):
         default=UserRole.USER  # По умолчанию - обычный пользователь
     )
 
+    # Счетчики задач ведут триггеры tasks_user_counters_* (models/task.py)
+    task_count = Column(Integer, nullable=False, server_default="0")
+    open_count = Column(Integer, nullable=False, server_default="0")
+    completed_count = Column(Integer, nullable=False, server_default="0")
+    # Версия задач пользователя для ETag, растет с каждой записью (триггеры tasks_user_counters_*)
+    tasks_version = Column(BigInteger, nullable=False, server_default="0")
+
+    # Версия выданных токенов (claim tv): увеличение отзывает все токены пользователя
+    token_version = Column(Integer, nullable=False, server_default="0")
+
     # Связь с задачами (один пользователь -> много задач)
     tasks = relationship(
         "Task",
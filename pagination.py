@@ -0,0 +1,110 @@
+# pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Упаковывает значения ключа последней строки страницы в непрозрачный курсор.
+    datetime сохраняем в ISO-формате с пометкой типа.
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _matches_column(value: Any, column) -> bool:
+    """Значение курсора подходит по типу к колонке ключа"""
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        # Тип выражения неизвестен - значение проверит БД
+        return True
+    if isinstance(value, bool) and expected is not bool:
+        return False
+    if expected is float:
+        return isinstance(value, (int, float))
+    if expected is datetime:
+        # Наивные даты в БД нельзя сравнивать с датой с часовым поясом
+        return isinstance(value, datetime) and (
+            value.tzinfo is None or getattr(column.type, "timezone", False)
+        )
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """
+    Распаковывает курсор обратно в список значений ключа.
+    Любой испорченный курсор (в том числе с другими типами значений) -> 400.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("неверная длина курсора")
+        values = [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload
+        ]
+        if not all(_matches_column(value, column) for value, column in zip(values, columns)):
+            raise ValueError("неверный тип значения курсора")
+        return values
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации"
+        )
+
+
+def apply_keyset(stmt, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = False):
+    """
+    Добавляет к запросу keyset-условие (row-value сравнение), сортировку и LIMIT.
+    Берем на одну строку больше, чтобы понять, есть ли следующая страница.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        bound = tuple_(*[literal(value, column.type) for column, value in zip(columns, values)])
+        if descending:
+            stmt = stmt.where(tuple_(*columns) < bound)
+        else:
+            stmt = stmt.where(tuple_(*columns) > bound)
+
+    order_by = [column.desc() if descending else column.asc() for column in columns]
+    return stmt.order_by(*order_by).limit(limit + 1)
+
+
+async def fetch_page(
+    db: AsyncSession,
+    stmt,
+    columns: Sequence,
+    key: Callable[[Any], Sequence[Any]],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+    scalars: bool = True,
+) -> Tuple[list, Optional[str]]:
+    """
+    Выполняет запрос одной страницей и возвращает (строки, next_cursor).
+    key достает из строки значения тех же колонок, что переданы в columns.
+    """
+    result = await db.execute(apply_keyset(stmt, columns, cursor, limit, descending))
+    rows = list(result.scalars().all() if scalars else result.all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+
+    return rows, next_cursor
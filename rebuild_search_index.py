@@ -0,0 +1,58 @@
+# rebuild_search_index.py
+import argparse
+import asyncio
+from sqlalchemy import text
+from database import engine
+from models.task import SEARCH_VECTOR_EXPR
+
+BATCH_SIZE = 5000
+
+
+async def rebuild_search_index(batch_size: int = BATCH_SIZE, rebuild_all: bool = False):
+    """
+    Пересчитывает search_vector пачками по id.
+    Каждая пачка - отдельная короткая транзакция, чтобы не держать блокировки.
+    По умолчанию обрабатываются только строки без search_vector.
+    """
+    only_missing = "" if rebuild_all else "AND search_vector IS NULL"
+    statement = text(f"""
+        WITH batch AS (
+            SELECT id FROM tasks
+            WHERE id > :last_id {only_missing}
+            ORDER BY id
+            LIMIT :batch_size
+        )
+        UPDATE tasks t
+        SET search_vector = {SEARCH_VECTOR_EXPR.format(row="t.")}
+        FROM batch
+        WHERE t.id = batch.id
+        RETURNING t.id;
+    """)
+
+    print("🔄 Пересборка поискового индекса задач...")
+    last_id = 0
+    total = 0
+    while True:
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                statement, {"last_id": last_id, "batch_size": batch_size}
+            )
+            ids = [row.id for row in result]
+
+        if not ids:
+            break
+
+        last_id = max(ids)
+        total += len(ids)
+        print(f"   обработано {total} задач (последний id {last_id})")
+
+    print(f"🎉 Готово, обновлено задач: {total}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пересборка search_vector для задач")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--all", action="store_true", help="пересчитать все строки, а не только пустые")
+    args = parser.parse_args()
+    asyncio.run(rebuild_search_index(args.batch_size, args.all))
@@ -2,6 +2,7 @@
 import asyncio
 from sqlalchemy import text
 from database import engine
+from migrations import apply_migrations
 
 async def migrate_database():
     async with engine.begin() as conn:
@@ -84,5 +85,10 @@ async def migrate_database():
         
         print("🎉 База данных успешно обновлена!")
 
+async def main():
+    # Базовая схема, затем версионированные шаги из migrations.py
+    await migrate_database()
+    await apply_migrations()
+
 if __name__ == "__main__":
-    asyncio.run(migrate_database())
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
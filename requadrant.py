@@ -0,0 +1,121 @@
+# requadrant.py
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import case, func, select, update
+
+from database import async_session_maker
+from invalidation import tasks_changed
+from models.task import Task
+from utils import urgency_boundary
+
+logger = logging.getLogger(__name__)
+
+# Как часто пересчитывать квадранты; 0 - не запускать фоновую задачу
+REQUADRANT_INTERVAL_SECONDS = float(os.getenv("REQUADRANT_INTERVAL_SECONDS", "300"))
+
+# Один воркер за раз: остальные пропускают прогон, если ключ занят
+REQUADRANT_LOCK_KEY = 7310001
+
+# Итоги последнего прогона (для /admin/jobs/requadrant)
+last_run = {
+    "runs": 0,
+    "rows": None,
+    "duration_ms": None,
+    "finished_at": None,
+    "skipped": False,
+}
+
+# Граница срочности прошлого прогона: следующий берет только окно после нее
+_last_boundary: Optional[datetime] = None
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+async def requadrant_once() -> int:
+    """
+    Одним UPDATE переводит Q2 -> Q1 и Q4 -> Q3 для незавершенных задач,
+    чей дедлайн с прошлого прогона вошел в окно срочности.
+    Диапазон по deadline_at идет по индексу ix_tasks_deadline_open.
+    """
+    global _last_boundary
+
+    started = time.perf_counter()
+    boundary = urgency_boundary(datetime.utcnow())
+
+    conditions = [
+        Task.completed == False,
+        Task.deadline_at < boundary,
+        Task.quadrant.in_(("Q2", "Q4")),
+    ]
+    # Первый прогон в процессе догоняет все, дальше - только новое окно
+    if _last_boundary is not None:
+        conditions.append(Task.deadline_at >= _last_boundary)
+
+    statement = (
+        update(Task)
+        .where(*conditions)
+        .values(quadrant=case((Task.is_important == True, "Q1"), else_="Q3"))
+        .execution_options(synchronize_session=False)
+    )
+
+    async with async_session_maker() as session:
+        locked = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(REQUADRANT_LOCK_KEY))
+        )
+        if not locked:
+            await session.rollback()
+            last_run["skipped"] = True
+            return 0
+
+        result = await session.execute(statement)
+        await session.commit()
+
+    rows = result.rowcount
+    _last_boundary = boundary
+    if rows:
+        # Квадранты поменялись у разных пользователей
+        tasks_changed(None)
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    last_run.update(
+        runs=last_run["runs"] + 1,
+        rows=rows,
+        duration_ms=round(duration_ms, 2),
+        finished_at=datetime.utcnow().isoformat(),
+        skipped=False,
+    )
+    logger.info("Пересчет квадрантов: обновлено %s задач за %.1f мс", rows, duration_ms)
+    return rows
+
+
+async def _run_forever(interval: float) -> None:
+    while True:
+        try:
+            await requadrant_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Ошибка пересчета квадрантов")
+        await asyncio.sleep(interval)
+
+
+def start_requadrant_scheduler() -> None:
+    global _scheduler_task
+    if REQUADRANT_INTERVAL_SECONDS <= 0 or _scheduler_task is not None:
+        return
+    _scheduler_task = asyncio.create_task(_run_forever(REQUADRANT_INTERVAL_SECONDS))
+
+
+async def stop_requadrant_scheduler() -> None:
+    global _scheduler_task
+    if _scheduler_task is None:
+        return
+    _scheduler_task.cancel()
+    try:
+        await _scheduler_task
+    except asyncio.CancelledError:
+        pass
+    _scheduler_task = None
@@ -0,0 +1,79 @@
+# response_cache.py
+import functools
+import os
+import time
+from dotenv import load_dotenv
+from fastapi import Request, Response, status
+
+from cache import SizedLRUCache
+from etag import ETAG_TIME_BUCKET_SECONDS, etag_matches, user_scope
+from database import is_replica_session, replica_may_lag
+from invalidation import data_version, last_change_at
+
+load_dotenv()
+
+# Бюджет памяти кэша ответов на воркер; 0 - кэш выключен
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Большие ответы (длинные страницы) не кэшируем, чтобы не вытеснять остальное
+RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+# Верхняя граница жизни записи: изменения из других воркеров видны не позже
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+
+response_cache = SizedLRUCache(
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    max_entry_bytes=RESPONSE_CACHE_MAX_ENTRY_BYTES,
+)
+
+
+def entry_ttl(time_dependent: bool) -> float:
+    if not time_dependent:
+        return RESPONSE_CACHE_TTL_SECONDS
+    # Ответ с days_until_deadline живет до конца интервала своего ETag
+    bucket_left = ETAG_TIME_BUCKET_SECONDS - time.time() % ETAG_TIME_BUCKET_SECONDS
+    return min(RESPONSE_CACHE_TTL_SECONDS, bucket_left)
+
+
+def cached_response(time_dependent: bool = True):
+    """
+    Кэш готовых JSON-ответов маршрута по (пользователь/all, путь, параметры).
+    При попадании нет ни запросов к БД, ни сериализации.
+    Маршрут должен принимать request и current_user и отдавать json_response с ETag.
+    """
+    def decorator(route):
+        @functools.wraps(route)
+        async def wrapper(*args, **kwargs):
+            if RESPONSE_CACHE_MAX_BYTES <= 0:
+                return await route(*args, **kwargs)
+
+            request: Request = kwargs["request"]
+            current_user = kwargs["current_user"]
+            key = (user_scope(current_user), request.url.path, request.url.query)
+            # Версию берем до чтения из БД: запись, случившаяся во время
+            # запроса, сделает сохраненный ответ устаревшим
+            version = data_version(current_user)
+
+            cached = response_cache.get(key, version)
+            if cached is not None:
+                etag, content = cached
+                if etag_matches(request, etag):
+                    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+                return Response(content=content, media_type="application/json", headers={"ETag": etag})
+
+            response = await route(*args, **kwargs)
+            # Реплику выбрали до изменения, а версию взяли после: ответ может
+            # быть старше версии - не кэшируем, пока реплика может отставать
+            db = kwargs.get("db")
+            if db is not None and is_replica_session(db) and replica_may_lag(last_change_at(current_user)):
+                return response
+
+            etag = response.headers.get("etag")
+            if response.status_code == status.HTTP_200_OK and etag:
+                response_cache.set(
+                    key, version, (etag, response.body),
+                    size=len(response.body), ttl=entry_ttl(time_dependent),
+                )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,45 +1,168 @@
 # routers/admin.py
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, or_
 
-from database import get_async_session  # ИСПРАВЛЕН ИМПОРТ
+from database import pool_status  # ИСПРАВЛЕН ИМПОРТ
 from models.user import User, UserRole
-from models.task import Task
-from dependencies import get_current_admin
-from typing import List
+from dependencies import get_current_admin, get_replica_session
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page
+from schemas_auth import AdminUserPage
+from requadrant import last_run as requadrant_last_run
+from importer import import_task_stream, resolve_owner
+from cache import user_cache
+from auth_utils import token_cache
+from response_cache import response_cache
+from typing import Optional
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"]
 )
 
-@router.get("/users", response_model=List[dict])
+# Колонки сортировки списка пользователей; вторая колонка ключа - id
+USER_SORT_COLUMNS = {
+    "id": User.id,
+    "task_count": User.task_count,
+    "open_count": User.open_count,
+    "completed_count": User.completed_count,
+}
+
+@router.get("/users", response_model=AdminUserPage)
 async def get_all_users_with_task_count(
+    sort: str = Query("id", pattern="^(id|task_count|open_count|completed_count)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    role: Optional[UserRole] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, description="Начало никнейма или email"),
+    min_tasks: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
     current_user: User = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_async_session)  # ИСПРАВЛЕНО
+    db: AsyncSession = Depends(get_replica_session)
 ):
-    """Получить всех пользователей с количеством их задач"""
-    result = await db.execute(
-        select(
-            User.id,
-            User.nickname,
-            User.email,
-            User.role,
-            func.count(Task.id).label("task_count")
-        ).outerjoin(Task, User.id == Task.user_id)
-        .group_by(User.id)
+    """Пользователи с количеством задач: счетчики из users, без JOIN с tasks"""
+    query = select(
+        User.id,
+        User.nickname,
+        User.email,
+        User.role,
+        User.task_count,
+        User.open_count,
+        User.completed_count,
+    )
+    if role is not None:
+        query = query.where(User.role == role)
+    if q:
+        # % и _ во вводе - обычные символы, фильтр остается префиксным
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"{escaped}%"
+        query = query.where(or_(
+            User.nickname.ilike(pattern, escape="\\"),
+            User.email.ilike(pattern, escape="\\"),
+        ))
+    if min_tasks is not None:
+        query = query.where(User.task_count >= min_tasks)
+
+    sort_column = USER_SORT_COLUMNS[sort]
+    columns = (sort_column, User.id) if sort != "id" else (User.id,)
+    rows, next_cursor = await fetch_page(
+        db, query, columns,
+        lambda row: tuple(row._mapping[column.key] for column in columns),
+        cursor, limit, descending=order == "desc", scalars=False
     )
-    
-    users_with_counts = result.all()
-    
-    return [
-        {
-            "id": user.id,
-            "nickname": user.nickname,
-            "email": user.email,
-            "role": user.role.value,
-            "task_count": user.task_count or 0
-        }
-        for user in users_with_counts
-    ]
\ No newline at end of file
+
+    return {
+        "count": len(rows),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "users": [
+            {
+                "id": row.id,
+                "nickname": row.nickname,
+                "email": row.email,
+                "role": row.role.value,
+                "task_count": row.task_count,
+                "open_count": row.open_count,
+                "completed_count": row.completed_count,
+            }
+            for row in rows
+        ],
+    }
+
+@router.get("/jobs/requadrant", response_model=dict)
+async def get_requadrant_job_status(
+    current_user: User = Depends(get_current_admin)
+):
+    """Итоги последнего фонового пересчета квадрантов в этом воркере"""
+    return requadrant_last_run
+
+
+@router.get("/pool", response_model=dict)
+async def get_pool_status(
+    current_user: User = Depends(get_current_admin)
+):
+    """Статистика пула соединений с БД в этом воркере"""
+    return pool_status()
+
+
+@router.get("/cache", response_model=dict)
+async def get_cache_status(
+    current_user: User = Depends(get_current_admin)
+):
+    """Кэши этого воркера: ответы, пользователи и проверенные токены"""
+    return {
+        "responses": {
+            "entries": len(response_cache),
+            "size_bytes": response_cache.size_bytes,
+            "max_bytes": response_cache.max_bytes,
+            "hits": response_cache.hits,
+            "misses": response_cache.misses,
+            "stale": response_cache.stale,
+            "evictions": response_cache.evictions,
+            "hit_ratio": round(response_cache.hit_ratio, 4),
+        },
+        "users": {
+            "entries": len(user_cache),
+            "hits": user_cache.hits,
+            "misses": user_cache.misses,
+            "evictions": user_cache.evictions,
+        },
+        "tokens": {
+            "entries": len(token_cache),
+            "hits": token_cache.hits,
+            "misses": token_cache.misses,
+            "evictions": token_cache.evictions,
+        },
+    }
+
+
+# Сколько ошибок по строкам вернуть в ответе импорта
+IMPORT_ERROR_LIMIT = 1000
+
+
+@router.post("/tasks/import", response_model=dict)
+async def import_tasks(
+    file: UploadFile = File(...),
+    user_id: int = Query(..., description="Владелец импортируемых задач"),
+    import_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_admin)
+):
+    """Массовый импорт задач пользователя из CSV/NDJSON (через COPY)"""
+    if await resolve_owner(user_id=user_id) is None:
+        raise HTTPException(404, f"Пользователь {user_id} не найден")
+
+    # Starlette уже сохранил загрузку во временный файл - читаем его потоково
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = await import_task_stream(
+            stream, import_format, user_id, error_limit=IMPORT_ERROR_LIMIT
+        )
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Пачки до ошибки уже загружены
+        raise HTTPException(400, f"Не удалось прочитать файл: {exc}")
+    finally:
+        stream.detach()
+
+    return report.as_dict()
@@ -2,13 +2,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 
-from database import get_async_session  # ИСПРАВЛЕН ИМПОРТ
+from database import get_async_session, mark_user_write  # ИСПРАВЛЕН ИМПОРТ
 from models.user import User, UserRole
 from schemas_auth import UserCreate, UserResponse, Token, ChangePassword
-from auth_utils import verify_password, get_password_hash, create_access_token
+from auth_utils import (
+    verify_password_async, get_password_hash_async, create_access_token, TOKEN_VERSION_CLAIM
+)
 from dependencies import get_current_user
+from cache import invalidate_user
 
 router = APIRouter(
     prefix="/auth",
@@ -48,7 +51,7 @@ async def register(
     new_user = User(
         nickname=user_data.nickname,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         role=UserRole.USER
     )
 
@@ -70,7 +73,7 @@ async def login(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(
+    if not user or not await verify_password_async(
         form_data.password,
         user.hashed_password
     ):
@@ -81,7 +84,11 @@ async def login(
         )
 
     access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role.value}
+        data={
+            "sub": str(user.id),
+            "role": user.role.value,
+            TOKEN_VERSION_CLAIM: user.token_version,
+        }
     )
 
     return {
@@ -105,17 +112,43 @@ async def change_password(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_session)  # ИСПРАВЛЕНО
 ):
+    # current_user берется из кэша без хеша пароля - читаем хеш из БД
+    result = await db.execute(
+        select(User.hashed_password).where(User.id == current_user.id)
+    )
+    hashed_password = result.scalar_one()
+
     # Проверяем старый пароль
-    if not verify_password(password_data.old_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.old_password, hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Неверный старый пароль"
         )
     
-    # Хешируем новый пароль
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    
+    # Хешируем новый пароль; все выданные ранее токены отзываются
+    token_version = await db.scalar(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(
+            hashed_password=await get_password_hash_async(password_data.new_password),
+            token_version=User.token_version + 1,
+        )
+        .returning(User.token_version)
+    )
     await db.commit()
-    await db.refresh(current_user)
-    
-    return {"message": "Пароль успешно изменен"}
\ No newline at end of file
+    invalidate_user(current_user.id)
+    mark_user_write(current_user.id)
+
+    # Текущий токен больше не действует - выдаем новый
+    access_token = create_access_token(
+        data={
+            "sub": str(current_user.id),
+            "role": current_user.role.value,
+            TOKEN_VERSION_CLAIM: token_version,
+        }
+    )
+    return {
+        "message": "Пароль успешно изменен",
+        "access_token": access_token,
+        "token_type": "bearer"
+    }
\ No newline at end of file
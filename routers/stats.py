@@ -1,14 +1,17 @@
 # routers/stats.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
+from sqlalchemy import select, func, case, cast, extract, literal, DateTime, Integer
 from typing import List
 from datetime import datetime
 
-from database import get_async_session  # ИСПРАВЛЕН ИМПОРТ
 from models.task import Task
 from schemas import TimingStatsResponse
-from dependencies import get_current_user
+from utils import URGENCY_DAYS
+from etag import check_etag
+from serialization import json_response
+from response_cache import cached_response
+from dependencies import get_current_user, get_read_session
 
 router = APIRouter(
     prefix="/stats",
@@ -16,108 +19,102 @@ router = APIRouter(
 )
 
 # ---------------- GET ОБЩИЕ СТАТИСТИКИ (с учетом прав) ----------------
+QUADRANTS = ["Q1", "Q2", "Q3", "Q4"]
+
 @router.get("/", response_model=dict)
+@cached_response(time_dependent=False)
 async def get_tasks_stats(
-    db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
+    request: Request,
+    db: AsyncSession = Depends(get_read_session),
     current_user = Depends(get_current_user)
-) -> dict:
-    # Админ видит все задачи, пользователь - только свои
-    if current_user.role.value == "admin":
-        total_result = await db.execute(select(func.count(Task.id)))
-        total_tasks = total_result.scalar() or 0
-
-        quadrant_result = await db.execute(
-            select(Task.quadrant, func.count(Task.id).label("count"))
-            .group_by(Task.quadrant)
-        )
-    else:
-        # Пользователь видит только свои задачи
-        total_result = await db.execute(
-            select(func.count(Task.id))
-            .where(Task.user_id == current_user.id)
-        )
-        total_tasks = total_result.scalar() or 0
+):
+    # Счетчики от времени не зависят - ETag меняется только вместе с данными
+    etag, not_modified = await check_etag(request, db, current_user, time_dependent=False)
+    if not_modified:
+        return not_modified
 
-        quadrant_result = await db.execute(
-            select(Task.quadrant, func.count(Task.id).label("count"))
-            .where(Task.user_id == current_user.id)
-            .group_by(Task.quadrant)
-        )
-
-    by_quadrant = {"Q1": 0, "Q2": 0, "Q3": 0, "Q4": 0}
-    for row in quadrant_result.all():
-        if row.quadrant in ["Q1", "Q2", "Q3", "Q4"]:
-            by_quadrant[row.quadrant] = row.count
+    # Все счетчики одним проходом: COUNT(*) FILTER (WHERE ...)
+    query = select(
+        func.count().label("total"),
+        *[
+            func.count().filter(Task.quadrant == quadrant).label(quadrant)
+            for quadrant in QUADRANTS
+        ],
+        func.count().filter(Task.completed == True).label("completed"),
+        func.count().filter(Task.completed == False).label("pending"),
+    )
+    # Админ видит все задачи, пользователь - только свои
+    if current_user.role.value != "admin":
+        query = query.where(Task.user_id == current_user.id)
 
-    # Статистика по статусу
-    if current_user.role.value == "admin":
-        status_result = await db.execute(
-            select(
-                func.count(case((Task.completed == True, 1))).label("completed"),
-                func.count(case((Task.completed == False, 1))).label("pending")
-            )
-        )
-    else:
-        status_result = await db.execute(
-            select(
-                func.count(case((Task.completed == True, 1))).label("completed"),
-                func.count(case((Task.completed == False, 1))).label("pending")
-            ).where(Task.user_id == current_user.id)
-        )
-    
-    status_row = status_result.one()
-    by_status = {
-        "completed": status_row.completed,
-        "pending": status_row.pending
-    }
+    row = (await db.execute(query)).one()
 
-    return {
-        "total_tasks": total_tasks,
-        "by_quadrant": by_quadrant,
-        "by_status": by_status,
+    return json_response({
+        "total_tasks": row.total,
+        "by_quadrant": {quadrant: row._mapping[quadrant] for quadrant in QUADRANTS},
+        "by_status": {
+            "completed": row.completed,
+            "pending": row.pending
+        },
         "user_id": current_user.id
-    }
+    }, headers={"ETag": etag})
 
 # ---------------- GET СТАТИСТИКА ПО ДЕДЛАЙНАМ (с учетом прав) ----------------
+# Сколько ближайших дедлайнов отдаем по умолчанию и максимум
+DEADLINE_STATS_DEFAULT_LIMIT = 100
+DEADLINE_STATS_MAX_LIMIT = 1000
+
 @router.get("/deadlines", response_model=List[dict])
+@cached_response()
 async def get_deadline_stats(
-    db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
+    request: Request,
+    limit: int = Query(DEADLINE_STATS_DEFAULT_LIMIT, ge=1, le=DEADLINE_STATS_MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_session),
     current_user = Depends(get_current_user)
-) -> List[dict]:
-    # Админ видит все задачи, пользователь - только свои
-    if current_user.role.value == "admin":
-        result = await db.execute(
-            select(Task).where(
-                Task.deadline_at.isnot(None),
-                Task.completed.is_(False)
-            )
-        )
-    else:
-        result = await db.execute(
-            select(Task).where(
-                Task.user_id == current_user.id,
-                Task.deadline_at.isnot(None),
-                Task.completed.is_(False)
-            )
-        )
-    
-    tasks = result.scalars().all()
+):
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
     now = datetime.utcnow()
-    response = []
 
-    for task in tasks:
-        if task.deadline_at:
-            delta = task.deadline_at - now
-            days_until_deadline = delta.days
-            status = "срочно" if days_until_deadline <= 3 else "не срочно"
-            
-            response.append({
-                "id": task.id,
-                "title": task.title,
-                "deadline_at": task.deadline_at.isoformat() if task.deadline_at else None,
-                "days_until_deadline": days_until_deadline,
-                "status": status,
-                "user_id": task.user_id
-            })
+    # Дни до дедлайна считаем в БД так же, как timedelta.days (округление вниз)
+    days_until_deadline = cast(
+        func.floor(extract("epoch", Task.deadline_at - literal(now, DateTime)) / 86400),
+        Integer
+    )
+    deadline_status = case(
+        (days_until_deadline <= URGENCY_DAYS, "срочно"),
+        else_="не срочно"
+    )
+
+    # Только нужные колонки, без ORM-объектов и description
+    query = select(
+        Task.id,
+        Task.title,
+        Task.deadline_at,
+        Task.user_id,
+        days_until_deadline.label("days_until_deadline"),
+        deadline_status.label("status"),
+    ).where(
+        Task.deadline_at.isnot(None),
+        Task.completed.is_(False)
+    )
+    # Админ видит все задачи, пользователь - только свои
+    if current_user.role.value != "admin":
+        query = query.where(Task.user_id == current_user.id)
+
+    # Top-N ближайших дедлайнов по индексу (deadline_at) WHERE completed = false
+    result = await db.execute(query.order_by(Task.deadline_at, Task.id).limit(limit))
 
-    return response
\ No newline at end of file
+    return json_response([
+        {
+            "id": row.id,
+            "title": row.title,
+            "deadline_at": row.deadline_at.isoformat(),
+            "days_until_deadline": row.days_until_deadline,
+            "status": row.status,
+            "user_id": row.user_id
+        }
+        for row in result
+    ], headers={"ETag": etag})
@@ -1,16 +1,33 @@
 # routers/tasks.py
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, List
-from datetime import datetime
+from sqlalchemy import (
+    select, insert, update, delete, func, any_, literal, Integer, Boolean, DateTime, String, Text
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import Optional, List, AsyncIterator
+from datetime import datetime, timedelta
+import csv
+import io
+import json
 
-from database import get_async_session  # ИСПРАВЛЕН ИМПОРТ
-from schemas import TaskCreate, TaskUpdate, TaskResponse
-from models.task import Task
+from database import get_async_session, mark_user_write, read_session_maker  # ИСПРАВЛЕН ИМПОРТ
+from schemas import (
+    TaskCreate, TaskUpdate, TaskResponse,
+    TaskBulkCreate, TaskBulkUpdate, TaskBulkIds, BulkResponse
+)
+from models.task import Task, search_filter, search_rank
 from models.user import User
-from dependencies import get_current_user
-from utils import calculate_urgency, calculate_days_until_deadline, determine_quadrant
+from dependencies import get_current_user, get_read_session
+from utils import (
+    calculate_urgency, calculate_days_until_deadline, determine_quadrant, quadrant_sql, to_naive_utc
+)
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, fetch_page
+from serialization import json_response, serialize_tasks
+from etag import check_etag
+from invalidation import last_change_at, tasks_changed
+from response_cache import cached_response
 
 router = APIRouter(
     prefix="/tasks",
@@ -35,84 +52,277 @@ def to_response(task) -> TaskResponse:
         completed_at=task.completed_at,
         days_until_deadline=days_left,
         is_urgent=is_urgent,
-        overdue=overdue
+        overdue=overdue,
+        user_id=task.user_id
     )
-    
+
+# Списки задач отдаются через serialization.serialize_tasks + json_response:
+# без pydantic-моделей на каждую строку и с одним now на запрос
+
+# Ключ keyset-пагинации списков задач: (created_at, id)
+TASK_PAGE_COLUMNS = (Task.created_at, Task.id)
+
+def task_page_key(task) -> tuple:
+    return (task.created_at, task.id)
+
+# ===== HELPERS: проверка владения прямо в запросе =====
+def ids_param(ids: List[int]):
+    # Один параметр-массив: id = ANY(:ids) вместо IN с параметром на каждый id
+    return any_(literal(ids, ARRAY(Integer)))
+
+def owner_conditions(current_user: User) -> list:
+    # Админ работает со всеми задачами, пользователь - только со своими
+    if current_user.role.value == "admin":
+        return []
+    return [Task.user_id == current_user.id]
+
+async def missing_ids_status(db: AsyncSession, missing: List[int], current_user: User) -> dict:
+    """Почему id не попали в UPDATE/DELETE: not_found или forbidden (один запрос)"""
+    if not missing:
+        return {}
+    if current_user.role.value == "admin":
+        return {task_id: "not_found" for task_id in missing}
+
+    result = await db.execute(select(Task.id).where(Task.id == ids_param(missing)))
+    existing = set(result.scalars().all())
+    return {
+        task_id: "forbidden" if task_id in existing else "not_found"
+        for task_id in missing
+    }
+
+async def raise_missing_or_forbidden(db: AsyncSession, task_id: int):
+    """UPDATE/DELETE с проверкой владения не нашел строку: 404 или 403"""
+    owner_id = await db.scalar(select(Task.user_id).where(Task.id == task_id))
+    if owner_id is None:
+        raise HTTPException(404, f"Задача {task_id} не найдена")
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Нет доступа к этой задаче"
+    )
+
+def after_write(current_user: User):
+    """После commit: новая версия данных для кэша ответов и чтение из основной БД"""
+    # Админ мог изменить задачи любых пользователей
+    tasks_changed(None if current_user.role.value == "admin" else current_user.id)
+    mark_user_write(current_user.id)
+
+def due_window_query(current_user: User, start: datetime, end: datetime):
+    """
+    Незавершенные задачи с дедлайном в [start, end).
+    Диапазон по deadline_at идет по частичным индексам WHERE completed = false.
+    """
+    query = select(Task).where(
+        Task.completed == False,
+        Task.deadline_at >= start,
+        Task.deadline_at < end
+    )
+    # Админ видит все задачи, пользователь - только свои
+    if current_user.role.value != "admin":
+        query = query.where(Task.user_id == current_user.id)
+    return query
+
 @router.get("/today", response_model=dict)
 async def get_tasks_due_today(
-    db: AsyncSession = Depends(get_async_session),
+    request: Request,
+    db: AsyncSession = Depends(get_read_session),
     current_user: User = Depends(get_current_user)
 ):
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
     today = datetime.utcnow().date()
+    today_start = datetime.combine(today, datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
     
-    # Админ видит все задачи, пользователь - только свои
-    if current_user.role.value == "admin":
-        result = await db.execute(
-            select(Task).where(
-                Task.deadline_at.isnot(None),
-                Task.completed == False
-            )
-        )
-    else:
-        result = await db.execute(
-            select(Task).where(
-                Task.user_id == current_user.id,
-                Task.deadline_at.isnot(None),
-                Task.completed == False
-            )
-        )
-    
-    all_tasks = result.scalars().all()
-    
-    # Фильтруем на сегодня в коде Python
-    today_tasks = []
-    for task in all_tasks:
-        if task.deadline_at and task.deadline_at.date() == today:
-            today_tasks.append(task)
+    result = await db.execute(
+        due_window_query(current_user, today_start, tomorrow_start)
+        .order_by(Task.deadline_at, Task.id)
+    )
+    today_tasks = result.scalars().all()
     
-    return {
+    return json_response({
         "date": today.isoformat(),
         "count": len(today_tasks),
-        "tasks": [to_response(t) for t in today_tasks]
-    }
+        "tasks": serialize_tasks(today_tasks)
+    }, headers={"ETag": etag})
+
+@router.get("/due", response_model=dict)
+async def get_tasks_due(
+    request: Request,
+    date_from: datetime = Query(..., alias="from"),
+    date_to: datetime = Query(..., alias="to"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_user)
+):
+    start = to_naive_utc(date_from)
+    end = to_naive_utc(date_to)
+    if end <= start:
+        raise HTTPException(400, "Параметр 'to' должен быть позже 'from'")
+
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
+    tasks, next_cursor = await fetch_page(
+        db, due_window_query(current_user, start, end),
+        (Task.deadline_at, Task.id),
+        lambda task: (task.deadline_at, task.id),
+        cursor, limit
+    )
+    return json_response({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "count": len(tasks),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "tasks": serialize_tasks(tasks)
+    }, headers={"ETag": etag})
 
 @router.get("/search", response_model=dict)
 async def search_tasks(
+    request: Request,
     q: str = Query(..., min_length=2),
-    db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_session),  # ИСПРАВЛЕНО
     current_user: User = Depends(get_current_user)
 ):
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
+    # Поиск по GIN-индексам (tsvector + pg_trgm), сортировка по релевантности
+    rank = search_rank(q)
+    query = select(Task, rank.label("rank")).where(search_filter(q))
     # Админ ищет во всех задачах, пользователь - только в своих
-    if current_user.role.value == "admin":
-        result = await db.execute(
-            select(Task).where(
-                (Task.title.ilike(f"%{q}%")) |
-                (Task.description.ilike(f"%{q}%"))
-            )
-        )
-    else:
-        result = await db.execute(
-            select(Task).where(
-                Task.user_id == current_user.id,
-                ((Task.title.ilike(f"%{q}%")) |
-                 (Task.description.ilike(f"%{q}%")))
-            )
-        )
-    
-    tasks = result.scalars().all()
+    if current_user.role.value != "admin":
+        query = query.where(Task.user_id == current_user.id)
+
+    rows, next_cursor = await fetch_page(
+        db, query, (rank, Task.id),
+        lambda row: (row.rank, row.Task.id),
+        cursor, limit, descending=True, scalars=False
+    )
+    tasks = [row.Task for row in rows]
     
-    if not tasks:
+    if not tasks and cursor is None:
         raise HTTPException(
             status_code=404,
             detail=f"Задачи по запросу '{q}' не найдены"
         )
     
-    return {
+    return json_response({
         "query": q,
         "count": len(tasks),
-        "tasks": [to_response(task) for task in tasks]
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "tasks": serialize_tasks(tasks)
+    }, headers={"ETag": etag})
+
+# ---------------- EXPORT (потоковая выгрузка) ----------------
+# Сколько строк за раз забираем из серверного курсора
+EXPORT_BATCH_SIZE = 1000
+
+# Выгружаем колонки, а не ORM-объекты: строки не копятся в identity map сессии
+EXPORT_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.is_important,
+    Task.deadline_at,
+    Task.quadrant,
+    Task.completed,
+    Task.created_at,
+    Task.completed_at,
+    Task.user_id,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS] + [
+    "days_until_deadline",
+    "is_urgent",
+    "overdue",
+]
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def export_record(row) -> dict:
+    days_left = calculate_days_until_deadline(row.deadline_at)
+    return {
+        "id": row.id,
+        "title": row.title,
+        "description": row.description,
+        "is_important": row.is_important,
+        "deadline_at": _isoformat(row.deadline_at),
+        "quadrant": row.quadrant,
+        "completed": row.completed,
+        "created_at": _isoformat(row.created_at),
+        "completed_at": _isoformat(row.completed_at),
+        "user_id": row.user_id,
+        "days_until_deadline": days_left,
+        "is_urgent": calculate_urgency(row.deadline_at),
+        "overdue": days_left is not None and days_left < 0,
     }
 
+async def export_batches(user_id: Optional[int], session_maker) -> AsyncIterator[List[dict]]:
+    """
+    Читает задачи серверным курсором пачками по EXPORT_BATCH_SIZE.
+    Сессия своя: она должна жить, пока отдается ответ.
+    user_id=None - выгрузка всех задач (для админа).
+    """
+    query = select(*EXPORT_COLUMNS).order_by(Task.id)
+    if user_id is not None:
+        query = query.where(Task.user_id == user_id)
+
+    async with session_maker() as session:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield [export_record(row) for row in rows]
+
+async def ndjson_stream(batches: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    async for batch in batches:
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+
+async def csv_stream(batches: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    async for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    # Заголовок для пустой выгрузки
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@router.get("/export")
+async def export_tasks(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user)
+):
+    # Админ выгружает все задачи, пользователь - только свои
+    user_id = None if current_user.role.value == "admin" else current_user.id
+    batches = export_batches(
+        user_id, read_session_maker(current_user.id, changed_at=last_change_at(current_user))
+    )
+
+    if export_format == "csv":
+        return StreamingResponse(
+            csv_stream(batches),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": "attachment; filename=tasks.csv"}
+        )
+    return StreamingResponse(
+        ndjson_stream(batches),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=tasks.ndjson"}
+    )
+
 # ---------------- CREATE ---------------- 
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
@@ -134,31 +344,194 @@ async def create_task(
         user_id=current_user.id  # Привязываем к текущему пользователю
     )
     
+    # id и created_at приходят в RETURNING самого INSERT (eager_defaults)
     db.add(db_task)
     await db.commit()
-    await db.refresh(db_task)
+    after_write(current_user)
     return to_response(db_task)
 
 # ---------------- GET ALL (с учетом прав) ----------------
 @router.get("/", response_model=dict)
+@cached_response()
 async def get_all_tasks(
-    db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_session),  # ИСПРАВЛЕНО
     current_user: User = Depends(get_current_user)
 ):
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
     # Админ видит все задачи, пользователь - только свои
-    if current_user.role.value == "admin":
-        result = await db.execute(select(Task))
-    else:
-        result = await db.execute(
-            select(Task).where(Task.user_id == current_user.id)
-        )
+    query = select(Task)
+    if current_user.role.value != "admin":
+        query = query.where(Task.user_id == current_user.id)
     
-    tasks = result.scalars().all()
-    return {
+    tasks, next_cursor = await fetch_page(
+        db, query, TASK_PAGE_COLUMNS, task_page_key, cursor, limit
+    )
+    return json_response({
         "count": len(tasks),
-        "tasks": [to_response(t) for t in tasks]
-    }
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "tasks": serialize_tasks(tasks)
+    }, headers={"ETag": etag})
+
+
+# ---------------- BULK (пакетные операции, с учетом прав) ----------------
+def bulk_response(results: List[dict]) -> dict:
+    return {"count": len(results), "results": results}
+
+@router.post("/bulk", response_model=BulkResponse, status_code=status.HTTP_201_CREATED)
+async def bulk_create_tasks(
+    payload: TaskBulkCreate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    rows = []
+    for task in payload.tasks:
+        is_urgent = calculate_urgency(task.deadline_at)
+        rows.append({
+            "title": task.title,
+            "description": task.description,
+            "is_important": task.is_important,
+            "deadline_at": task.deadline_at,
+            "quadrant": determine_quadrant(task.is_important, is_urgent),
+            "completed": False,
+            "user_id": current_user.id,
+        })
+
+    # Многострочный INSERT ... RETURNING, строки в порядке запроса
+    result = await db.scalars(
+        insert(Task).returning(Task, sort_by_parameter_order=True),
+        rows
+    )
+    created = result.all()
+    await db.commit()
+    after_write(current_user)
+
+    return bulk_response([
+        {"id": task.id, "status": "created", "task": to_response(task)}
+        for task in created
+    ])
+
+@router.put("/bulk", response_model=BulkResponse)
+async def bulk_update_tasks(
+    payload: TaskBulkUpdate,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    # Повторы id сливаем: более поздний элемент перекрывает переданные поля
+    changes = {}
+    for item in payload.tasks:
+        fields = changes.setdefault(item.id, {})
+        fields.update({
+            field: value
+            for field, value in item.dict(exclude_unset=True, exclude={"id"}).items()
+            if value is not None
+        })
+    ids = list(changes)
+
+    def column(name: str, column_type):
+        # Параметр-массив на колонку; NULL - поле не передано, остается как было
+        values = [changes[task_id].get(name) for task_id in ids]
+        return func.unnest(literal(values, ARRAY(column_type)), type_=column_type).label(name)
 
+    rows = select(
+        column("id", Integer),
+        column("title", String),
+        column("description", Text),
+        column("is_important", Boolean),
+        column("deadline_at", DateTime),
+        column("completed", Boolean),
+    ).subquery("v")
+
+    is_important = func.coalesce(rows.c.is_important, Task.is_important)
+    deadline_at = func.coalesce(rows.c.deadline_at, Task.deadline_at)
+
+    # Один UPDATE ... FROM unnest(...) RETURNING с проверкой владения
+    result = await db.scalars(
+        update(Task)
+        .where(Task.id == rows.c.id, *owner_conditions(current_user))
+        .values(
+            title=func.coalesce(rows.c.title, Task.title),
+            description=func.coalesce(rows.c.description, Task.description),
+            is_important=is_important,
+            deadline_at=deadline_at,
+            completed=func.coalesce(rows.c.completed, Task.completed),
+            quadrant=quadrant_sql(is_important, deadline_at, datetime.utcnow()),
+        )
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+    updated = {task.id: to_response(task) for task in result.all()}
+    failed = await missing_ids_status(
+        db, [task_id for task_id in ids if task_id not in updated], current_user
+    )
+    await db.commit()
+    after_write(current_user)
+
+    return bulk_response([
+        {"id": item.id, "status": "updated", "task": updated[item.id]}
+        if item.id in updated else {"id": item.id, "status": failed[item.id]}
+        for item in payload.tasks
+    ])
+
+@router.patch("/bulk/complete", response_model=BulkResponse)
+async def bulk_complete_tasks(
+    payload: TaskBulkIds,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    ids = list(dict.fromkeys(payload.ids))
+
+    result = await db.scalars(
+        update(Task)
+        .where(Task.id == ids_param(ids), *owner_conditions(current_user))
+        .values(completed=True, completed_at=datetime.utcnow())
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+    completed = {task.id: task for task in result.all()}
+    failed = await missing_ids_status(
+        db, [task_id for task_id in ids if task_id not in completed], current_user
+    )
+    await db.commit()
+    after_write(current_user)
+
+    return bulk_response([
+        {"id": task_id, "status": "completed", "task": to_response(completed[task_id])}
+        if task_id in completed else {"id": task_id, "status": failed[task_id]}
+        for task_id in ids
+    ])
+
+@router.post("/bulk/delete", response_model=BulkResponse)
+async def bulk_delete_tasks(
+    payload: TaskBulkIds,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    ids = list(dict.fromkeys(payload.ids))
+
+    result = await db.execute(
+        delete(Task)
+        .where(Task.id == ids_param(ids), *owner_conditions(current_user))
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = set(result.scalars().all())
+    failed = await missing_ids_status(
+        db, [task_id for task_id in ids if task_id not in deleted], current_user
+    )
+    await db.commit()
+    after_write(current_user)
+
+    return bulk_response([
+        {"id": task_id, "status": "deleted" if task_id in deleted else failed[task_id]}
+        for task_id in ids
+    ])
 
 # ---------------- UPDATE (с учетом прав) ----------------
 @router.put("/{task_id}", response_model=TaskResponse)
@@ -168,33 +541,39 @@ async def update_task(
     db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Task).where(Task.id == task_id)
-    )
-    task = result.scalar_one_or_none()
-    
-    if not task:
-        raise HTTPException(404, f"Задача {task_id} не найдена")
-    
-    # Проверяем права доступа
-    if current_user.role.value != "admin" and task.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нет доступа к этой задаче"
-        )
-    
     # Обновляем поля
-    update_data = task_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        if value is not None:
-            setattr(task, field, value)
+    update_data = {
+        field: value
+        for field, value in task_update.dict(exclude_unset=True).items()
+        if value is not None
+    }
+
+    # Пересчитываем квадрант в том же UPDATE: непереданные поля берем из строки
+    is_important = (
+        literal(update_data["is_important"], Boolean)
+        if "is_important" in update_data else Task.is_important
+    )
+    deadline_at = (
+        literal(update_data["deadline_at"], DateTime)
+        if "deadline_at" in update_data else Task.deadline_at
+    )
+    quadrant = quadrant_sql(is_important, deadline_at, datetime.utcnow())
+
+    # Один UPDATE ... RETURNING с проверкой прав вместо SELECT + UPDATE + SELECT
+    result = await db.scalars(
+        update(Task)
+        .where(Task.id == task_id, *owner_conditions(current_user))
+        .values(**update_data, quadrant=quadrant)
+        .returning(Task)
+        .execution_options(synchronize_session=False)
+    )
+    task = result.one_or_none()
     
-    # Пересчитываем квадрант
-    is_urgent = calculate_urgency(task.deadline_at)
-    task.quadrant = determine_quadrant(task.is_important, is_urgent)
+    if task is None:
+        await raise_missing_or_forbidden(db, task_id)
     
     await db.commit()
-    await db.refresh(task)
+    after_write(current_user)
     return to_response(task)
 
 # ---------------- COMPLETE (с учетом прав) ----------------
@@ -204,26 +583,20 @@ async def complete_task(
     db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Task).where(Task.id == task_id)
+    result = await db.scalars(
+        update(Task)
+        .where(Task.id == task_id, *owner_conditions(current_user))
+        .values(completed=True, completed_at=datetime.utcnow())
+        .returning(Task)
+        .execution_options(synchronize_session=False)
     )
-    task = result.scalar_one_or_none()
+    task = result.one_or_none()
     
-    if not task:
-        raise HTTPException(404, f"Задача {task_id} не найдена")
-    
-    # Проверяем права доступа
-    if current_user.role.value != "admin" and task.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нет доступа к этой задаче"
-        )
-    
-    task.completed = True
-    task.completed_at = datetime.utcnow()
+    if task is None:
+        await raise_missing_or_forbidden(db, task_id)
     
     await db.commit()
-    await db.refresh(task)
+    after_write(current_user)
     return to_response(task)
 
 # ---------------- DELETE (с учетом прав) ----------------
@@ -234,94 +607,103 @@ async def delete_task(
     current_user: User = Depends(get_current_user)
 ):
     result = await db.execute(
-        select(Task).where(Task.id == task_id)
+        delete(Task)
+        .where(Task.id == task_id, *owner_conditions(current_user))
+        .returning(Task.title)
+        .execution_options(synchronize_session=False)
     )
-    task = result.scalar_one_or_none()
+    title = result.scalar_one_or_none()
     
-    if not task:
-        raise HTTPException(404, f"Задача {task_id} не найдена")
+    if title is None:
+        await raise_missing_or_forbidden(db, task_id)
     
-    # Проверяем права доступа
-    if current_user.role.value != "admin" and task.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Нет доступа к этой задаче"
-        )
-    
-    await db.delete(task)
     await db.commit()
+    after_write(current_user)
     
     return {
         "message": "Задача успешно удалена",
         "id": task_id,
-        "title": task.title
+        "title": title
     }
 
 
 # ---------------- GET BY STATUS (с учетом прав) ----------------
-@router.get("/status/{status}", response_model=List[TaskResponse])
+@router.get("/status/{status}", response_model=dict)
 async def get_tasks_by_status(
+    request: Request,
     status: str,
-    db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_session),  # ИСПРАВЛЕНО
     current_user: User = Depends(get_current_user)
 ):
     if status not in ["completed", "pending"]:
         raise HTTPException(400, "Используйте: 'completed' или 'pending'")
     
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
     completed = status == "completed"
     
     # Админ видит все задачи, пользователь - только свои
-    if current_user.role.value == "admin":
-        result = await db.execute(
-            select(Task).where(Task.completed == completed)
-        )
-    else:
-        result = await db.execute(
-            select(Task).where(
-                Task.user_id == current_user.id,
-                Task.completed == completed
-            )
-        )
+    query = select(Task).where(Task.completed == completed)
+    if current_user.role.value != "admin":
+        query = query.where(Task.user_id == current_user.id)
     
-    tasks = result.scalars().all()
-    return [to_response(t) for t in tasks]
+    tasks, next_cursor = await fetch_page(
+        db, query, TASK_PAGE_COLUMNS, task_page_key, cursor, limit
+    )
+    return json_response({
+        "status": status,
+        "count": len(tasks),
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "tasks": serialize_tasks(tasks)
+    }, headers={"ETag": etag})
 
 # ---------------- GET BY QUADRANT (с учетом прав) ----------------
 @router.get("/quadrant/{quadrant}", response_model=dict)
+@cached_response()
 async def get_tasks_by_quadrant(
+    request: Request,
     quadrant: str,
-    db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_read_session),  # ИСПРАВЛЕНО
     current_user: User = Depends(get_current_user)
 ):
     if quadrant not in ["Q1", "Q2", "Q3", "Q4"]:
         raise HTTPException(status_code=400, detail="Используйте: Q1, Q2, Q3, Q4")
     
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
     # Админ видит все задачи, пользователь - только свои
-    if current_user.role.value == "admin":
-        result = await db.execute(
-            select(Task).where(Task.quadrant == quadrant)
-        )
-    else:
-        result = await db.execute(
-            select(Task).where(
-                Task.user_id == current_user.id,
-                Task.quadrant == quadrant
-            )
-        )
+    query = select(Task).where(Task.quadrant == quadrant)
+    if current_user.role.value != "admin":
+        query = query.where(Task.user_id == current_user.id)
     
-    tasks = result.scalars().all()
+    tasks, next_cursor = await fetch_page(
+        db, query, TASK_PAGE_COLUMNS, task_page_key, cursor, limit
+    )
     
-    return {
+    return json_response({
         "quadrant": quadrant,
         "count": len(tasks),
-        "tasks": [to_response(t) for t in tasks]
-    }
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "tasks": serialize_tasks(tasks)
+    }, headers={"ETag": etag})
 
 # ---------------- GET BY ID (с учетом прав) ----------------
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task_by_id(
     task_id: int,
-    db: AsyncSession = Depends(get_async_session),  # ИСПРАВЛЕНО
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_session),  # ИСПРАВЛЕНО
     current_user: User = Depends(get_current_user)
 ):
     result = await db.execute(
@@ -338,5 +720,11 @@ async def get_task_by_id(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Нет доступа к этой задаче"
         )
-    
+
+    # 304 - только для существующей задачи, к которой есть доступ
+    etag, not_modified = await check_etag(request, db, current_user)
+    if not_modified:
+        return not_modified
+
+    response.headers["ETag"] = etag
     return to_response(task)
\ No newline at end of file
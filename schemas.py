@@ -1,6 +1,6 @@
 # schemas.py
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 # ------------------ Схема для создания ------------------
@@ -40,6 +40,31 @@ class TaskResponse(BaseModel):
             datetime: lambda v: v.isoformat() if v else None
         }
 
+# ------------------ Схемы для пакетных операций ------------------
+# Максимум задач в одном пакетном запросе
+BULK_MAX_ITEMS = 1000
+
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBulkUpdate(BaseModel):
+    tasks: List[TaskBulkUpdateItem] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class TaskBulkIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+class BulkItemResult(BaseModel):
+    id: Optional[int] = None
+    status: str  # created / updated / completed / deleted / not_found / forbidden
+    task: Optional[TaskResponse] = None
+
+class BulkResponse(BaseModel):
+    count: int
+    results: List[BulkItemResult]
+
 # ------------------ Схема для статистики по дедлайнам ------------------
 class TimingStatsResponse(BaseModel):
     completed_on_time: int = Field(..., description="Количество задач, завершенных в срок")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import Optional, List
 from models.user import UserRole
 
 # Схема регистрации нового пользователя
@@ -43,4 +43,20 @@ class Token(BaseModel):
 # Схема для смены пароля
 class ChangePassword(BaseModel):
     old_password: str
-    new_password: str = Field(..., min_length=6)
\ No newline at end of file
+    new_password: str = Field(..., min_length=6)
+
+# Схемы списка пользователей для администратора
+class AdminUserResponse(BaseModel):
+    id: int
+    nickname: str
+    email: str
+    role: str
+    task_count: int
+    open_count: int
+    completed_count: int
+
+class AdminUserPage(BaseModel):
+    count: int
+    limit: int
+    next_cursor: Optional[str] = None
+    users: List[AdminUserResponse]
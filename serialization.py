@@ -0,0 +1,79 @@
+# serialization.py
+import json
+from datetime import datetime
+from typing import Any, Iterable, List, Optional
+from fastapi import Response
+
+from utils import URGENCY_DAYS
+from metrics import timed
+
+# orjson необязателен: без него работаем через стандартный json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, default=_default).encode()
+
+
+def serialize_task(task, now: datetime) -> dict:
+    """
+    То же, что to_response(task), но без pydantic-модели:
+    производные поля считаются от одного now на весь запрос.
+    """
+    deadline_at = task.deadline_at
+    if deadline_at is None:
+        days_left = None
+        is_urgent = False
+        overdue = False
+    else:
+        days_left = (deadline_at - now).days
+        is_urgent = days_left <= URGENCY_DAYS
+        overdue = days_left < 0
+
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "is_important": task.is_important,
+        "deadline_at": deadline_at,
+        "quadrant": task.quadrant,
+        "completed": task.completed,
+        "created_at": task.created_at,
+        "completed_at": task.completed_at,
+        "days_until_deadline": days_left,
+        "is_urgent": is_urgent,
+        "overdue": overdue,
+        "user_id": task.user_id,
+    }
+
+
+def serialize_tasks(tasks: Iterable, now: Optional[datetime] = None) -> List[dict]:
+    now = now or datetime.utcnow()
+    with timed("serialize_seconds"):
+        return [serialize_task(task, now) for task in tasks]
+
+
+def json_response(payload: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Готовые JSON-байты. FastAPI не валидирует Response повторно
+    по response_model, поэтому двойной проверки нет.
+    """
+    with timed("serialize_seconds"):
+        content = dumps(payload)
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
@@ -0,0 +1,89 @@
+# timing.py
+import logging
+import os
+import re
+import time
+from dotenv import load_dotenv
+
+from database import DB_PROFILE
+from metrics import RequestStats, current_request
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Заголовок Server-Timing включается явно
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+# Предупреждать, если одна форма SQL выполнилась за запрос больше N раз (только dev)
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+DETECT_REPEATED_SQL = DB_PROFILE == "dev" and SQL_REPEAT_THRESHOLD > 0
+
+# Списки параметров ($1, $2, ...) разной длины считаем одной формой
+_PARAM_LIST = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST.sub("$n", " ".join(statement.split()))
+
+
+def repeated_statements(stats: RequestStats, threshold: int) -> dict:
+    shapes: dict = {}
+    for statement, count in (stats.statements or {}).items():
+        shape = statement_shape(statement)
+        shapes[shape] = shapes.get(shape, 0) + count
+    return {shape: count for shape, count in shapes.items() if count > threshold}
+
+
+def server_timing_header(stats: RequestStats, total_seconds: float) -> str:
+    return ", ".join([
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.db_queries} queries"',
+        f"auth;dur={stats.auth_seconds * 1000:.2f}",
+        f"serialize;dur={stats.serialize_seconds * 1000:.2f}",
+        f"total;dur={total_seconds * 1000:.2f}",
+    ])
+
+
+class ServerTimingMiddleware:
+    """
+    Добавляет Server-Timing (db, auth, serialize, total) к ответу
+    и в dev-профиле ищет повторяющиеся SQL (N+1).
+    Время снимается в момент отправки заголовков ответа.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = current_request.get()
+        token = None
+        if stats is None:
+            stats = RequestStats()
+            token = current_request.set(stats)
+        if DETECT_REPEATED_SQL:
+            stats.statements = {}
+
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                header = server_timing_header(stats, time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if DETECT_REPEATED_SQL:
+                for shape, count in repeated_statements(stats, SQL_REPEAT_THRESHOLD).items():
+                    logger.warning(
+                        "Возможный N+1: %s %s выполнил один и тот же SQL %s раз: %s",
+                        scope["method"], scope["path"], count, shape[:300]
+                    )
+            if token is not None:
+                current_request.reset(token)
@@ -1,6 +1,10 @@
 # utils.py
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+from sqlalchemy import and_, case
+
+# Задача срочная, если до дедлайна не больше стольких дней
+URGENCY_DAYS = 3
 
 def calculate_days_until_deadline(deadline_at: Optional[datetime]) -> Optional[int]:
     """
@@ -20,7 +24,20 @@ def calculate_urgency(deadline_at: Optional[datetime]) -> bool:
     days_left = calculate_days_until_deadline(deadline_at)
     if days_left is None:
         return False
-    return days_left <= 3
+    return days_left <= URGENCY_DAYS
+
+def to_naive_utc(value: datetime) -> datetime:
+    # Дедлайны хранятся как naive UTC
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def urgency_boundary(now: datetime) -> datetime:
+    """
+    Граница срочности для SQL: (deadline - now).days <= 3
+    равносильно deadline < now + 4 дня.
+    """
+    return now + timedelta(days=URGENCY_DAYS + 1)
 
 def determine_quadrant(is_important: bool, is_urgent: bool) -> str:
     """
@@ -33,4 +50,18 @@ def determine_quadrant(is_important: bool, is_urgent: bool) -> str:
     elif not is_important and is_urgent:
         return "Q3"
     else:
-        return "Q4"
\ No newline at end of file
+        return "Q4"
+
+def quadrant_sql(is_important, deadline_at, now: datetime):
+    """
+    SQL-версия determine_quadrant(is_important, calculate_urgency(deadline_at))
+    для UPDATE без предварительного чтения строки.
+    Аргументы - колонки или типизированные literal().
+    """
+    is_urgent = and_(deadline_at.isnot(None), deadline_at < urgency_boundary(now))
+    return case(
+        (and_(is_important, is_urgent), "Q1"),
+        (is_important, "Q2"),
+        (is_urgent, "Q3"),
+        else_="Q4"
+    )